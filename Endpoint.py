@@ -1,6 +1,31 @@
 # Endpoint.py
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def create_session(pool_connections=10, pool_maxsize=20, headers=None):
+    """Create a requests.Session with a pooled, retrying HTTPAdapter."""
+    session = requests.Session()
+    if headers:
+        # Session-level defaults, so requests that send no headers of their own skip the merge
+        session.headers.update(headers)
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Shared session so API calls reuse keep-alive connections instead of
+# opening a new TCP/TLS connection per request
+_SESSION = create_session()
+
 
 class Endpoint:
     def __init__(self,
@@ -9,7 +34,9 @@ class Endpoint:
                  headers=None,
                  payload=None,
                  files=None,
-                 post_function=None):
+                 post_function=None,
+                 session=None,
+                 timeout=None):
 
         self.url = url
         self.method = method.upper()
@@ -17,6 +44,29 @@ class Endpoint:
         self.payload = payload or {}
         self.files = files or {}
         self.post_function = post_function
+        self.session = session
+        self.timeout = timeout
+
+    def _build_request_kwargs(self):
+        content_type = self.headers.get('Content-Type') or (self.session or _SESSION).headers.get('Content-Type')
+        if self.files:
+            body_key = 'data'
+        elif content_type == 'application/json':
+            body_key = 'json'
+        else:
+            body_key = 'data'
+        request_kwargs = {
+            'method': self.method,
+            'url': self.url,
+            body_key: self.payload,
+        }
+        if self.headers:
+            request_kwargs['headers'] = self.headers
+        if self.files:
+            request_kwargs['files'] = self.files
+        if self.timeout is not None:
+            request_kwargs['timeout'] = self.timeout
+        return request_kwargs
 
     def __str__(self):
         return (f'Endpoint(url={self.url}, method={self.method}, '
@@ -36,15 +86,16 @@ class Endpoint:
             'post_function': self.post_function
         }
 
+    def _key(self):
+        return (self.url, self.method, self.headers, self.payload, self.files, self.post_function)
+
     def __eq__(self, other):
         if not isinstance(other, Endpoint):
             return False
-        return self.to_dict() == other.to_dict()
-
-    def __ne__(self, other):
-        return not self.__eq__(other)
+        return self._key() == other._key()
 
     def __hash__(self):
+        # Derived from the current contents, so in-place edits to headers/payload keep it consistent with __eq__
         return hash(self.__str__())
 
     def __copy__(self):
@@ -54,28 +105,17 @@ class Endpoint:
             headers=self.headers.copy(),
             payload=self.payload.copy(),
             files=self.files.copy(),
-            post_function=self.post_function
+            post_function=self.post_function,
+            session=self.session,
+            timeout=self.timeout
         )
 
     def fetch(self):
-        request_kwargs = {
-            'method': self.method,
-            'url': self.url,
-            'headers': self.headers,
-        }
-
-        if self.files:
-            request_kwargs['files'] = self.files
-            request_kwargs['data'] = self.payload
-        elif self.headers.get('Content-Type') == 'application/json':
-            request_kwargs['json'] = self.payload
-        else:
-            request_kwargs['data'] = self.payload
-
-        response = requests.request(**request_kwargs)
+        session = self.session or _SESSION
+        response = session.request(**self._build_request_kwargs())
 
         try:
-            response_obj = response.json()
+            response_obj = orjson.loads(response.content)
         except Exception:
             response_obj = response.text
 
@@ -3,13 +3,21 @@
 
 import os
 
+# Worker class - gevent lets one worker serve requests while downloads stream
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+
+# Patch before preload_app imports main, so requests/threading/time become
+# cooperative. The gevent worker patches too, but only after the fork.
+if worker_class == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
 # Server socket
 bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
 backlog = 2048
 
 # Worker processes - Using 1 worker for homelab to maintain shared state
 workers = int(os.getenv('GUNICORN_WORKERS', '1'))
-worker_class = "sync"
 worker_connections = 1000
 # Worker timeout - increased for background downloads to prevent worker kills
 timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
@@ -50,6 +58,13 @@ enable_stdio_inheritance = True
 # certfile = "/path/to/certfile"
 
 # Worker hooks
+def post_fork(server, worker):
+    """Called in each worker after fork. Start periodic saves so worker_exit has little left to do."""
+    # Threads started in the master (preload_app) don't survive the fork and
+    # would only see the master's copy of the data, so start autosave here
+    from main import start_autosave
+    start_autosave()
+
 def worker_exit(server, worker):
     """Called when a worker exits. Save data to prevent loss."""
     try:
@@ -1,22 +1,28 @@
 # app.py
 from pathlib import Path
-from flask import Flask, request, jsonify, render_template, redirect, url_for, abort, send_from_directory, flash, session, g
-from Endpoint import Endpoint
+from werkzeug.utils import safe_join
+from flask import Flask, Response, request, render_template, redirect, url_for, abort, send_from_directory, flash, session, g
+from Endpoint import Endpoint, create_session
 import logging
 import threading
 import time
-import uuid
+import secrets
 import os
+import errno
+import sys
 import requests
-from urllib.parse import unquote
+import urllib3
+from urllib.parse import unquote, quote
 import re
-from datetime import datetime
 from dotenv import load_dotenv
-from functools import wraps
+from functools import wraps, lru_cache
 import shutil
 import queue
-import json
+import orjson
 import fcntl  # For file locking
+import ctypes
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from collections import OrderedDict, deque
 
 # Load environment variables from .env file
 load_dotenv()
@@ -36,6 +42,12 @@ AUTH_PASSWORD = os.getenv('AUTH_PASSWORD', 'password123')
 HOST = os.getenv('HOST', '0.0.0.0')
 PORT = int(os.getenv('PORT', 5000))
 DEBUG = os.getenv('FLASK_DEBUG', '0').lower() in ['true', '1', 'yes']
+# Let a front server (Apache mod_xsendfile, lighttpd) send files instead of Python.
+# Only enable this behind a proxy that honors the X-Sendfile header.
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', 'false').lower() in ['true', '1', 'yes']
+# Internal nginx location prefix for X-Accel-Redirect; files under it are sent by nginx itself.
+# Empty (the default) serves files from Python.
+X_ACCEL_REDIRECT_PREFIX = os.getenv('X_ACCEL_REDIRECT_PREFIX', '').rstrip('/')
 
 def require_auth(f):
     """Decorator to require basic authentication for routes."""
@@ -50,6 +62,10 @@ def require_auth(f):
 # --- Constants & Configuration ---
 API_BASE_URL = os.getenv('API_BASE_URL', 'https://acermovies.val.run/api')
 DEFAULT_HEADERS = {"Content-Type": "application/json", "Accept": "application/json"}
+# API calls share one pooled session that already carries DEFAULT_HEADERS
+API_SESSION = create_session(headers=DEFAULT_HEADERS)
+# (connect, read) seconds, so a stalled upstream can't hang a request forever
+API_TIMEOUT = (5, 30)
 # FIX 1: Use an absolute path for the default download directory.
 # This makes the path relative to the script's location, which is much more reliable.
 DEFAULT_DOWNLOAD_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'downloads'))
@@ -60,90 +76,152 @@ DEFAULT_COMPLETED_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__),
 DOWNLOAD_DIR = Path(os.getenv('DOWNLOAD_DIRECTORY', DEFAULT_DOWNLOAD_DIR))
 COMPLETED_DIR = Path(os.getenv('COMPLETED_DIRECTORY', DEFAULT_COMPLETED_DIR))
 
+# Upstream API response cache
+API_CACHE_TTL = int(os.getenv('API_CACHE_TTL', 600))  # Seconds to reuse a successful API response
+API_CACHE_MAXSIZE = 1024
+# Only listing lookups are cached; sourceUrl returns short-lived signed links
+CACHED_API_PATHS = frozenset({'search', 'sourceQuality', 'sourceEpisodes'})
+api_cache = OrderedDict()  # (path, payload) -> (expires_at, response_data, status_code)
+api_cache_lock = threading.Lock()
+
 # Sonarr blackhole configuration
 ENABLE_AUTO_MOVE = os.getenv('ENABLE_AUTO_MOVE', 'true').lower() in ['true', '1', 'yes']
 
 # --- In-memory storage for downloads ---
-download_progress = {}
-season_processing = {}  # Track background season processing status
-search_history = []  # Track recent searches (last 5)
+# Insertion ordered (oldest first) so listings need no sort and old entries can be evicted
+download_progress = OrderedDict()
+progress_lock = threading.Lock()  # Guards writes to download_progress and reads that copy it
+app_data_dirty = threading.Event()  # Set by every change to persisted state; autosave skips while clear
+# Bumped under progress_lock on every change, so clients can order snapshots and pushes. Seeded
+# with the start time in microseconds, so an open page still sees versions grow after a restart.
+progress_version = time.time_ns() // 1000
+MAX_TRACKED_DOWNLOADS = 500
+FINISHED_STATUSES = ('completed', 'error')
+# Server-Sent Events: one queue per connected /downloads/stream client
+progress_subscribers = []
+progress_subscribers_lock = threading.Lock()
+SSE_HEARTBEAT_INTERVAL = 15  # Seconds between keepalive comments on idle streams
+SSE_QUEUE_SIZE = 1000  # Updates buffered per client before dropping
+season_processing = {}  # Track background season processing status, oldest first
+season_processing_lock = threading.Lock()  # Guards inserts/evictions against listing copies
+MAX_TRACKED_SEASONS = 50
+search_history = deque(maxlen=5)  # Track recent searches, newest first
 
 # --- Download Queue System ---
-MAX_CONCURRENT_DOWNLOADS = 4
-download_queue = queue.Queue()  # Queue for pending downloads
+MAX_CONCURRENT_DOWNLOADS = int(os.getenv('MAX_CONCURRENT_DOWNLOADS', 4))
+download_queue = deque()  # Pending downloads; only touched under queue_lock
 active_downloads = set()  # Track currently active download IDs
 queue_lock = threading.Lock()  # Thread-safe operations on active_downloads
+# Bounded worker pool for downloads instead of a new thread per file
+DOWNLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB reads and write buffer for large video files
+PROGRESS_UPDATE_INTERVAL = 0.25  # Seconds between download_progress updates
+SOURCE_URL_WORKERS = int(os.getenv('SOURCE_URL_WORKERS', 8))  # Concurrent sourceUrl lookups when queuing a season
+# Large files from hosts that accept Range requests are fetched as this many parallel parts
+RANGE_DOWNLOAD_PARTS = int(os.getenv('RANGE_DOWNLOAD_PARTS', 4))
+RANGE_DOWNLOAD_MIN_SIZE = 32 << 20  # Smaller files are not worth the extra connections
+download_pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_DOWNLOADS, thread_name_prefix='download')
+# Season setup (sourceUrl lookups and queuing) shares a small pool instead of a thread per request
+season_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='season-setup')
+# Shared session so streamed downloads reuse pooled connections. Video is already
+# compressed, so ask for it as-is rather than gzipped and decoded again here.
+# Every running download may hold RANGE_DOWNLOAD_PARTS connections to the same host.
+DOWNLOAD_SESSION = create_session(pool_maxsize=max(8, MAX_CONCURRENT_DOWNLOADS * max(1, RANGE_DOWNLOAD_PARTS)), headers={'Accept-Encoding': 'identity'})
 
 APP_DATA_FOLDER = Path('app_data')
 APP_DATA_FILE = APP_DATA_FOLDER / 'app_data.json'
+AUTOSAVE_INTERVAL = int(os.getenv('AUTOSAVE_INTERVAL', 30))  # Seconds between background saves
 
 # --- Data Persistence Functions ---
 def save_data():
     """Save download progress and queue state when app exits."""
+    # Cleared before the snapshot, so changes made while saving mark the data dirty again
+    app_data_dirty.clear()
     try:
-        logger.info("Saving app data...")
+        logger.debug("Saving app data...")
         
         # Create app data folder if it doesn't exist
         APP_DATA_FOLDER.mkdir(parents=True, exist_ok=True)
         
+        with progress_lock:
+            progress_snapshot = {download_id: progress.copy() for download_id, progress in download_progress.items()}
+        # Copy the queue and the active set under queue_lock, so worker threads can't change them mid-copy
+        with queue_lock:
+            queue_snapshot = list(download_queue)
+            active_snapshot = list(active_downloads)
         data_to_save = {
-            'download_progress': download_progress,
-            'download_queue': list(download_queue.queue),
-            'active_downloads': list(active_downloads),
-            'search_history': search_history
+            'download_progress': progress_snapshot,
+            'download_queue': queue_snapshot,
+            'active_downloads': active_snapshot,
+            'search_history': list(search_history)
         }
         
-        # Use file locking to prevent race conditions between multiple processes
-        lock_file = APP_DATA_FILE.with_suffix('.lock')
-        
-        # Try to acquire exclusive lock
-        try:
-            with lock_file.open('w') as lock_fd:
-                fcntl.flock(lock_fd.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-                
-                # Check if we should save (only if we have data or file doesn't exist)
-                if any(data_to_save.values()) or not APP_DATA_FILE.exists():
-                    logger.debug(f"App data to save: {data_to_save}")
-                    
-                    # Write to a temporary file first, then move to prevent corruption
-                    temp_file = APP_DATA_FILE.with_suffix('.tmp')
-                    with temp_file.open('w') as f:
-                        json.dump(data_to_save, f, indent=2)
-                    temp_file.replace(APP_DATA_FILE)
-                    
-                    logger.info("App data saved successfully.")
-                else:
-                    logger.debug("No meaningful data to save, skipping")
-                
-                # Lock is automatically released when file is closed
-                
-        except (OSError, IOError) as lock_error:
-            # Another process is already saving, skip this save
-            logger.debug(f"Another process is saving data, skipping: {lock_error}")
+        # Check if we should save (only if we have data or file doesn't exist)
+        if not any(data_to_save.values()) and APP_DATA_FILE.exists():
+            logger.debug("No meaningful data to save, skipping")
             return
         
-        # Clean up lock file
-        try:
-            lock_file.unlink(missing_ok=True)
-        except:
-            pass  # Ignore cleanup errors
+        # Counts only: formatting every progress entry on each autosave would cost as much as the dump
+        logger.debug(f"App data to save: {len(progress_snapshot)} downloads, {len(queue_snapshot)} queued")
+        
+        # Write to a temporary file first, then move to prevent corruption. The temp file doubles
+        # as the lock between processes; append mode leaves another writer's data alone until locked.
+        temp_file = APP_DATA_FILE.with_suffix('.tmp')
+        with temp_file.open('ab') as f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logger.debug("Another process is saving data, skipping")
+                app_data_dirty.set()
+                return
+            try:
+                renamed = os.fstat(f.fileno()).st_ino != os.stat(temp_file).st_ino
+            except FileNotFoundError:
+                renamed = True
+            if renamed:
+                # The file we opened was renamed into place by a save that just finished;
+                # its snapshot may predate our changes, so leave them for the next save
+                logger.debug("Another process just saved data, skipping")
+                app_data_dirty.set()
+                return
+            f.truncate(0)
+            # Compact unless debugging; the file is only read back by load_data
+            f.write(orjson.dumps(data_to_save, option=orjson.OPT_INDENT_2 if DEBUG else 0))
+            f.flush()
+            os.fsync(f.fileno())
+            # Rename while still locked, so no other process can start writing this file
+            temp_file.replace(APP_DATA_FILE)
+        
+        logger.debug("App data saved successfully.")
             
     except Exception as e:
+        app_data_dirty.set()
         logger.error(f"Failed to save data: {e}")
 
+def start_autosave():
+    """Start a background thread that saves app data every AUTOSAVE_INTERVAL seconds."""
+    def autosave_loop():
+        while True:
+            time.sleep(AUTOSAVE_INTERVAL)
+            if app_data_dirty.is_set():
+                save_data()
+    
+    thread = threading.Thread(target=autosave_loop, name='autosave')
+    thread.daemon = True
+    thread.start()
+    logger.info(f"Autosaving app data every {AUTOSAVE_INTERVAL}s")
+
 def load_data():
     """Load download progress and queue state when app starts."""
-    global search_history
     try:
         logger.info("Loading app data...")
         if not APP_DATA_FILE.exists():
             logger.info("No existing app data file found. Starting fresh.")
             return
-        with APP_DATA_FILE.open('r') as f:
-            data_loaded = json.load(f)
-            download_progress.update(data_loaded.get('download_progress', {}))
-            for item in data_loaded.get('download_queue', []):
-                download_queue.put(item)
+        with APP_DATA_FILE.open('rb') as f:
+            data_loaded = orjson.loads(f.read())
+            with progress_lock:
+                download_progress.update(data_loaded.get('download_progress', {}))
+            download_queue.extend(data_loaded.get('download_queue', []))
             active_downloads.update(data_loaded.get('active_downloads', []))
             search_history.extend(data_loaded.get('search_history', []))
         logger.info("App data loaded successfully.")
@@ -151,66 +229,192 @@ def load_data():
         logger.error(f"Failed to load data: {e}")
 
 # --- Helper Functions ---
-        
+
+# Deletes invalid filename characters and turns spaces into underscores in one pass
+_SANITIZE_TABLE = str.maketrans({' ': '_', **{c: None for c in '\\/*?:"<>|'}})
+
 def sanitize_filename(filename):
     """Removes illegal characters from a filename."""
-    # Remove invalid characters and replace spaces with underscores
-    sanitized = re.sub(r'[\\/*?:"<>|]', "", filename)
-    sanitized = sanitized.replace(' ', '_')
-    # Limit filename length to avoid issues with file systems
-    return sanitized[:200]
+    # Remove invalid characters, replace spaces with underscores and
+    # limit filename length to avoid issues with file systems
+    return filename.translate(_SANITIZE_TABLE)[:200]
+
+# Absolute paths, parent references, NUL bytes and backslashes, checked in one regex pass
+_UNSAFE_PATH_RE = re.compile(r'^/|\.\.|\x00|\\')
+
+def is_unsafe_filename(filename):
+    """Return True if a filename from a form is empty or could escape its directory."""
+    return not filename or _UNSAFE_PATH_RE.search(filename) is not None
+
+def track_download(download_id, info):
+    """Add a download to download_progress, evicting the oldest finished ones past the cap."""
+    global progress_version
+    evicted = []
+    with progress_lock:
+        download_progress[download_id] = info
+        download_progress.move_to_end(download_id)
+        progress_version += 1
+        app_data_dirty.set()
+        excess = len(download_progress) - MAX_TRACKED_DOWNLOADS
+        if excess > 0:
+            for old_id, old_info in list(download_progress.items()):
+                if excess <= 0:
+                    break
+                if old_info.get('status') in FINISHED_STATUSES:
+                    del download_progress[old_id]
+                    evicted.append(old_id)
+                    excess -= 1
+        version = progress_version
+    # Tell open pages to drop evicted entries instead of showing them until a reload
+    for old_id in evicted:
+        publish_update({'id': old_id, 'removed': True, 'version': version})
+    publish_progress(download_id)
+
+def track_season(processing_id, info):
+    """Add a season job to season_processing, evicting the oldest finished ones past the cap."""
+    with season_processing_lock:
+        season_processing[processing_id] = info
+        excess = len(season_processing) - MAX_TRACKED_SEASONS
+        if excess > 0:
+            for old_id, old_info in list(season_processing.items()):
+                if excess <= 0:
+                    break
+                if old_info.get('status') in FINISHED_STATUSES:
+                    del season_processing[old_id]
+                    excess -= 1
+
+def update_season(processing_id, fields):
+    """Update fields of a tracked season job under season_processing_lock, if it is still tracked."""
+    with season_processing_lock:
+        info = season_processing.get(processing_id)
+        if info is not None:
+            info.update(fields)
+
+def update_download(download_id, fields):
+    """Update fields of a tracked download under progress_lock."""
+    global progress_version
+    with progress_lock:
+        download_progress[download_id].update(fields)
+        progress_version += 1
+        app_data_dirty.set()
+
+def fetch_api_cached(path, payload, use_cache=True):
+    """POST to an upstream API path, reusing successful responses for API_CACHE_TTL seconds."""
+    cacheable = path in CACHED_API_PATHS
+    cache_key = (path, orjson.dumps(payload, option=orjson.OPT_SORT_KEYS))
+    if cacheable and use_cache:
+        with api_cache_lock:
+            cached = api_cache.get(cache_key)
+        if cached and cached[0] > time.monotonic():
+            logger.debug(f"API cache hit: {path}")
+            return cached[1], cached[2], None
+    
+    endpoint = Endpoint(url=f'{API_BASE_URL}/{path}', session=API_SESSION, timeout=API_TIMEOUT, method='POST', payload=payload)
+    response_data, status_code, response = endpoint.fetch()
+    
+    # Only cache parsed JSON; a text body or an error object would otherwise be served for the whole TTL
+    parsed = isinstance(response_data, list) or (isinstance(response_data, dict) and 'error' not in response_data)
+    if cacheable and status_code == 200 and parsed:
+        with api_cache_lock:
+            api_cache[cache_key] = (time.monotonic() + API_CACHE_TTL, response_data, status_code)
+            api_cache.move_to_end(cache_key)
+            while len(api_cache) > API_CACHE_MAXSIZE:
+                api_cache.popitem(last=False)
+    return response_data, status_code, response
+
+def download_summary(download_id, progress):
+    """Build the client-facing view of a download's progress."""
+    return {'id': download_id, 'filename': progress.get('filename', 'Unknown'), 'status': progress.get('status', 'unknown'), 'progress': f"{progress.get('progress', 0):.2f}", 'size': progress.get('size', '0 MB'), 'speed': progress.get('speed', '0 KB/s'), 'error': progress.get('error')}
+
+def publish_progress(download_id):
+    """Push a download's current progress to every /downloads/stream client."""
+    if not progress_subscribers:
+        return
+    with progress_lock:
+        progress = download_progress.get(download_id)
+        if progress is None:
+            return
+        progress = progress.copy()
+        version = progress_version
+    publish_update({**download_summary(download_id, progress), 'version': version})
+
+def publish_update(update):
+    """Queue an update for every /downloads/stream client."""
+    if not progress_subscribers:
+        return
+    message = orjson.dumps(update)
+    with progress_subscribers_lock:
+        subscribers = list(progress_subscribers)
+    for subscriber in subscribers:
+        try:
+            subscriber.put_nowait(message)
+        except queue.Full:
+            pass  # Slow client; it will resync from /downloads on reconnect
 
 def add_to_search_history(query):
     """Add a search query to the search history, keeping only the last 5."""
-    global search_history
-    
     # Remove query if it already exists to avoid duplicates
-    if query in search_history:
+    try:
         search_history.remove(query)
+    except ValueError:
+        pass
     
-    # Add to the beginning of the list
-    search_history.insert(0, query)
-    
-    # Keep only the last 5 searches
-    search_history = search_history[:5]
+    # Add to the front; the deque's maxlen drops the oldest past 5
+    search_history.appendleft(query)
+    app_data_dirty.set()
     
-    logger.debug(f"Updated search history: {search_history}")
+    logger.debug("Updated search history: %s", search_history)
 
+# Title-parsing patterns, compiled once since they run for every episode of a season download
+# Show-name patterns 1-3 as one anchored alternation; branches are tried in the same order
+# as separate matches would be, and (?i:S) keeps pattern 3's case-insensitivity to itself
+_SHOW_NAME_RE = re.compile(
+    r'^(?:([^(]+?)\s*\([Ss]eason|([^(]+?)\s*\([Cc]omplete'  # 1: Show Name (Season X / (Complete
+    r'|(.*?)\s*[-–]\s*[Ss]eason\s*\d+|(.*?)\s+[Ss]eason\s*\d+'  # 2: Show Name - Season X / Season X
+    r'|(.*?)\s*(?i:S)\d+)'  # 3: Show Name S01-S12 / S01E01
+)
+# Pattern number and its capture groups, keyed by the group that matched
+_SHOW_NAME_GROUPS = {1: (1, (1, 2)), 2: (1, (1, 2)), 3: (2, (3, 4)), 4: (2, (3, 4)), 5: (3, (5, 5))}
+_BRACKETED_RE = re.compile(r'\s*[\[\({].*?[\]\)}]\s*')
+_QUALITY_SUFFIX_RE = re.compile(r'\s*(720p|1080p|4K|HDTV|BluRay|WEB-DL|REMUX).*$', re.IGNORECASE)
+_SEASON_OR_YEAR_SUFFIX_RE = re.compile(r'\s*(S\d+|Season\s*\d+|\d{4}).*$', re.IGNORECASE)
+# Deletes invalid filename characters and turns spaces into dots in one pass
+_TITLE_TABLE = str.maketrans({' ': '.', **{c: None for c in '\\/*?:"<>|'}})
+_MULTI_DOT_RE = re.compile(r'\.+')
+_SXXEXX_RE = re.compile(r'S(\d+)E(\d+)', re.IGNORECASE)
+_SEASON_NUM_RE = re.compile(r'Season[_\s](\d+)', re.IGNORECASE)
+_EPISODE_NUM_RE = re.compile(r'Episode[_\s](\d+)', re.IGNORECASE)
+_QUALITY_SEASON_RE = re.compile(r'Season\s*(\d+)', re.IGNORECASE)
+# Resolution labels in priority order, with the lowercase form matched case-insensitively
+_RESOLUTION_PRIORITY = tuple((res, res.lower()) for res in ('4K', '2160p', '1080p', '720p', '480p'))
+_SIZE_BRACKET_RE = re.compile(r'\s*\[[^\]]*(?:MB|GB|KB)\][^\]]*', re.IGNORECASE)
+_EMPTY_BRACKET_RE = re.compile(r'\s*\[\s*\]\s*')
+_WHITESPACE_RE = re.compile(r'\s+')
+# Turns path separators into spaces and deletes other invalid characters in one pass
+_MOVIE_SAFE_TABLE = str.maketrans({':': ' -', '/': ' ', '\\': ' ', **{c: None for c in '<>"|?*'}})
+
+# Season downloads call this once per episode with the same title
+@lru_cache(maxsize=1024)
 def extract_clean_show_name(full_title):
     """Extract just the show name from a messy torrent title."""
     logger.info(f"Extracting clean show name from: '{full_title}'")
     
-    # Common patterns to extract show name from torrent titles
-    # Try different patterns in order of specificity
-    
-    # Pattern 1: Show Name (Season X...) or Show Name (Complete Series)
-    pattern1 = re.match(r'^([^(]+?)\s*\([Ss]eason|^([^(]+?)\s*\([Cc]omplete', full_title)
-    if pattern1:
-        show_name = (pattern1.group(1) or pattern1.group(2)).strip()
-        logger.info(f"Pattern 1 matched: '{show_name}'")
-        return clean_show_title_string(show_name)
-    
-    # Pattern 2: Show Name - Season X or Show Name Season X
-    pattern2 = re.match(r'^(.*?)\s*[-–]\s*[Ss]eason\s*\d+|^(.*?)\s+[Ss]eason\s*\d+', full_title)
-    if pattern2:
-        show_name = (pattern2.group(1) or pattern2.group(2)).strip()
-        logger.info(f"Pattern 2 matched: '{show_name}'")
-        return clean_show_title_string(show_name)
-    
-    # Pattern 3: Show Name S01-S12 or Show Name S01E01
-    pattern3 = re.match(r'^(.*?)\s*S\d+', full_title, re.IGNORECASE)
-    if pattern3:
-        show_name = pattern3.group(1).strip()
-        logger.info(f"Pattern 3 matched: '{show_name}'")
+    # Common patterns to extract show name from torrent titles, in order of specificity;
+    # patterns 1-3 are tried in a single pass
+    match = _SHOW_NAME_RE.match(full_title)
+    if match:
+        pattern_number, (first_group, second_group) = _SHOW_NAME_GROUPS[match.lastindex]
+        show_name = (match.group(first_group) or match.group(second_group)).strip()
+        logger.info(f"Pattern {pattern_number} matched: '{show_name}'")
         return clean_show_title_string(show_name)
     
     # Pattern 4: Remove common quality/format indicators from the end and take the first part
     # Remove things like [720p], {English}, (2019), etc.
-    cleaned = re.sub(r'\s*[\[\({].*?[\]\)}]\s*', ' ', full_title)
+    cleaned = _BRACKETED_RE.sub(' ', full_title)
     # Remove quality indicators
-    cleaned = re.sub(r'\s*(720p|1080p|4K|HDTV|BluRay|WEB-DL|REMUX).*$', '', cleaned, flags=re.IGNORECASE)
+    cleaned = _QUALITY_SUFFIX_RE.sub('', cleaned)
     # Take everything before the first season indicator or year
-    cleaned = re.sub(r'\s*(S\d+|Season\s*\d+|\d{4}).*$', '', cleaned, flags=re.IGNORECASE)
+    cleaned = _SEASON_OR_YEAR_SUFFIX_RE.sub('', cleaned)
     
     show_name = cleaned.strip()
     if show_name:
@@ -221,13 +425,12 @@ def extract_clean_show_name(full_title):
     logger.warning(f"No pattern matched, using fallback for: '{full_title}'")
     return clean_show_title_string(full_title)
 
+@lru_cache(maxsize=1024)
 def clean_show_title_string(title):
     """Clean a show title string for filename use."""
-    # Remove invalid filename characters
-    cleaned = re.sub(r'[\\/*?:"<>|]', '', title)
-    # Replace spaces with dots, but clean up multiple dots
-    cleaned = cleaned.replace(' ', '.')
-    cleaned = re.sub(r'\.+', '.', cleaned)  # Replace multiple dots with single dot
+    # Remove invalid filename characters and replace spaces with dots, then clean up multiple dots
+    cleaned = title.translate(_TITLE_TABLE)
+    cleaned = _MULTI_DOT_RE.sub('.', cleaned)  # Replace multiple dots with single dot
     # Remove leading/trailing dots
     cleaned = cleaned.strip('.')
     return cleaned
@@ -249,33 +452,29 @@ def create_episode_filename_from_context(show_title, episode_title, selected_qua
         episode_num = 1  # default
         
         # Look for SxxExx pattern first
-        sxxexx_match = re.search(r'S(\d+)E(\d+)', episode_title, re.IGNORECASE)
+        sxxexx_match = _SXXEXX_RE.search(episode_title)
         if sxxexx_match:
             season_num = int(sxxexx_match.group(1))
             episode_num = int(sxxexx_match.group(2))
         else:
             # Look for Season X Episode Y pattern
-            season_match = re.search(r'Season[_\s](\d+)', episode_title, re.IGNORECASE)
+            season_match = _SEASON_NUM_RE.search(episode_title)
             if season_match:
                 season_num = int(season_match.group(1))
             
-            episode_match = re.search(r'Episode[_\s](\d+)', episode_title, re.IGNORECASE)
+            episode_match = _EPISODE_NUM_RE.search(episode_title)
             if episode_match:
                 episode_num = int(episode_match.group(1))
         
         # Extract season from selected_quality if not found in episode title
         if 'Season' in selected_quality:
-            season_quality_match = re.search(r'Season\s*(\d+)', selected_quality, re.IGNORECASE)
+            season_quality_match = _QUALITY_SEASON_RE.search(selected_quality)
             if season_quality_match:
                 season_num = int(season_quality_match.group(1))
         
         # Extract only the resolution from selected_quality (keep it simple)
-        quality = '720p'  # default
-        resolution_priorities = ['4K', '2160p', '1080p', '720p', '480p']
-        for res in resolution_priorities:
-            if re.search(res, selected_quality, re.IGNORECASE):
-                quality = res
-                break
+        quality_lower = selected_quality.lower()
+        quality = next((res for res, res_lower in _RESOLUTION_PRIORITY if res_lower in quality_lower), '720p')  # default 720p
         
         # Format the filename: Show.Title.S##E##.Quality.ext
         season_str = f"S{season_num:02d}"
@@ -305,16 +504,14 @@ def create_movie_filename_from_context(movie_title, selected_quality, original_f
         clean_title = selected_quality.strip()
         
         # Remove file size brackets: [1.8GB], [470MB], [2.6GB], etc.
-        clean_title = re.sub(r'\s*\[[^\]]*(?:MB|GB|KB)\][^\]]*', '', clean_title, flags=re.IGNORECASE)
+        clean_title = _SIZE_BRACKET_RE.sub('', clean_title)
         
-        # Remove any remaining empty brackets or extra spaces
-        clean_title = re.sub(r'\s*\[\s*\]\s*', '', clean_title)
-        clean_title = re.sub(r'\s+', ' ', clean_title).strip()
+        # Remove any remaining empty brackets
+        clean_title = _EMPTY_BRACKET_RE.sub('', clean_title)
         
-        # Sanitize for filesystem
-        safe_title = clean_title.replace(':', ' -').replace('/', ' ').replace('\\', ' ')
-        safe_title = re.sub(r'[<>"|?*]', '', safe_title)
-        safe_title = re.sub(r'\s+', ' ', safe_title).strip()
+        # Sanitize for filesystem, then collapse extra spaces in a single pass
+        safe_title = clean_title.translate(_MOVIE_SAFE_TABLE)
+        safe_title = _WHITESPACE_RE.sub(' ', safe_title).strip()
         
         formatted_filename = f"{safe_title}{ext}"
         
@@ -326,6 +523,25 @@ def create_movie_filename_from_context(movie_title, selected_quality, original_f
         # Fall back to original sanitization
         return sanitize_filename(original_filename)
 
+def list_directory_files(directory, location):
+    """List the files in a directory, sorted by name, for the file manager."""
+    # os.scandir gets the file type with the listing, so each file needs only one stat call
+    try:
+        with os.scandir(directory) as it:
+            entries = sorted((entry for entry in it if entry.is_file()), key=lambda entry: entry.name)
+    except FileNotFoundError:
+        return []
+    files = []
+    for entry in entries:
+        file_stats = entry.stat()
+        files.append({
+            'name': entry.name,
+            'size': format_size(file_stats.st_size),
+            'modified': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(file_stats.st_mtime)),
+            'location': location
+        })
+    return files
+
 # --- Authentication Routes ---
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -378,9 +594,8 @@ def search_results():
     # Add to search history
     add_to_search_history(search_query)
     
-    endpoint = Endpoint(url=f'{API_BASE_URL}/search', headers=DEFAULT_HEADERS, method='POST', payload={"searchQuery": search_query})
     try:
-        response_data, status_code, _ = endpoint.fetch()
+        response_data, status_code, _ = fetch_api_cached('search', {"searchQuery": search_query})
         if status_code == 200 and response_data.get('searchResult'):
             return render_template('results.html', results=response_data['searchResult'], query=search_query)
         else:
@@ -397,9 +612,8 @@ def select_quality():
     movie_image = request.form.get('image')
     if not movie_url:
         return redirect(url_for('index'))
-    endpoint = Endpoint(url=f'{API_BASE_URL}/sourceQuality', headers=DEFAULT_HEADERS, method='POST', payload={"url": movie_url})
     try:
-        response_data, status_code, _ = endpoint.fetch()
+        response_data, status_code, _ = fetch_api_cached('sourceQuality', {"url": movie_url})
         if status_code == 200 and response_data.get('sourceQualityList'):
             movie_info = {'title': movie_title, 'image': movie_image}
             return render_template('qualities.html', qualities=response_data['sourceQualityList'], movie=movie_info)
@@ -418,9 +632,8 @@ def list_episodes():
     selected_quality = request.form.get('quality')  # Get the selected quality/season info
     if not episodes_api_url:
         return "Error: No episodes URL provided.", 400
-    endpoint = Endpoint(url=f'{API_BASE_URL}/sourceEpisodes', headers=DEFAULT_HEADERS, method='POST', payload={"url": episodes_api_url})
     try:
-        response_data, status_code, _ = endpoint.fetch()
+        response_data, status_code, _ = fetch_api_cached('sourceEpisodes', {"url": episodes_api_url})
         if status_code == 200 and response_data.get('sourceEpisodes'):
             show_info = {'title': show_title, 'image': show_image}
             return render_template('episodes.html', episodes=response_data['sourceEpisodes'], show=show_info, selected_quality=selected_quality)
@@ -433,39 +646,15 @@ def list_episodes():
 @app.route('/downloads_page')
 @require_auth
 def downloads_page():
-    return render_template('downloads.html')
+    return render_template('downloads.html', stream_updates=streaming_supported())
 
 @app.route('/file_manager')
 @require_auth
 def file_manager():
     try:
-        # Get files from downloads directory
-        downloads_files = []
-        if os.path.exists(DOWNLOAD_DIR):
-            for filename in sorted(os.listdir(DOWNLOAD_DIR)):
-                filepath = os.path.join(DOWNLOAD_DIR, filename)
-                if os.path.isfile(filepath):
-                    file_stats = os.stat(filepath)
-                    downloads_files.append({
-                        'name': filename,
-                        'size': format_size(file_stats.st_size),
-                        'modified': datetime.fromtimestamp(file_stats.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                        'location': 'downloads'
-                    })
-        
-        # Get files from completed directory
-        completed_files = []
-        if os.path.exists(COMPLETED_DIR):
-            for filename in sorted(os.listdir(COMPLETED_DIR)):
-                filepath = os.path.join(COMPLETED_DIR, filename)
-                if os.path.isfile(filepath):
-                    file_stats = os.stat(filepath)
-                    completed_files.append({
-                        'name': filename,
-                        'size': format_size(file_stats.st_size),
-                        'modified': datetime.fromtimestamp(file_stats.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                        'location': 'completed'
-                    })
+        # Get files from downloads and completed directories
+        downloads_files = list_directory_files(DOWNLOAD_DIR, 'downloads')
+        completed_files = list_directory_files(COMPLETED_DIR, 'completed')
         
         return render_template('file_manager.html', 
                              downloads_files=downloads_files, 
@@ -496,11 +685,9 @@ def start_download():
     if not source_api_url:
         return "Error: No source URL provided.", 400
     try:
-        url_endpoint = Endpoint(url=f'{API_BASE_URL}/sourceUrl', headers=DEFAULT_HEADERS, method='POST', payload={"url": source_api_url, "seriesType": series_type})
-        response_data, status_code, _ = url_endpoint.fetch()
-        if status_code != 200 or not response_data.get('sourceUrl'):
+        direct_download_url = resolve_source_url(source_api_url, series_type)
+        if not direct_download_url:
             return "Error: Could not retrieve the final download URL from the API.", 500
-        direct_download_url = unquote(response_data['sourceUrl'])
         
         # Create smart filename based on context
         if series_type == 'episode' and show_title and episode_title and selected_quality:
@@ -513,37 +700,37 @@ def start_download():
             safe_filename = sanitize_filename(filename)
             logger.info(f"Using sanitized filename: {safe_filename}")
         
-        download_id = str(uuid.uuid4())
-        download_progress[download_id] = {'status': 'starting', 'progress': 0, 'speed': '0 KB/s', 'size': '0 MB', 'downloaded': 0, 'total': 0, 'start_time': time.time(), 'filename': safe_filename, 'error': None}
+        download_id = secrets.token_hex(16)
+        track_download(download_id, {'status': 'starting', 'progress': 0, 'speed': '0 KB/s', 'size': '0 MB', 'downloaded': 0, 'total': 0, 'start_time': time.time(), 'filename': safe_filename, 'error': None})
         queue_download(download_id, direct_download_url, safe_filename)
         logger.info(f"Download queued: {download_id} - {safe_filename}")
         return redirect(url_for('downloads_page'))
-        return redirect(url_for('downloads_page'))
     except Exception as e:
         logger.error(f"Download start error: {str(e)}")
         return f"A critical error occurred: {e}", 500
 
-def process_season_downloads_background(episodes_data, show_title, selected_quality):
-    """Process all season episodes in background to avoid worker timeout."""
-    processing_id = str(uuid.uuid4())
+def resolve_source_url(source_link, series_type='episode'):
+    """Ask the API for a direct download URL. Returns None if it has none."""
+    # Never cached (not in CACHED_API_PATHS): the returned download links can be short-lived
+    response_data, status_code, _ = fetch_api_cached('sourceUrl', {"url": source_link, "seriesType": series_type})
+    if status_code != 200 or not response_data.get('sourceUrl'):
+        return None
+    return unquote(response_data['sourceUrl'])
+
+def process_season_downloads_background(episodes, show_title, selected_quality):
+    """Process a parsed list of season episodes in background to avoid worker timeout."""
+    processing_id = secrets.token_hex(16)
     
     try:
-        import json
-        episodes = json.loads(episodes_data)
-        
-        if not episodes or not isinstance(episodes, list):
-            logger.error("Invalid episodes data for season download")
-            return
-        
         # Track season processing status
-        season_processing[processing_id] = {
+        track_season(processing_id, {
             'show_title': show_title,
             'total_episodes': len(episodes),
             'processed_episodes': 0,
             'successful_downloads': 0,
             'start_time': time.time(),
             'status': 'processing'
-        }
+        })
         
         logger.info(f"Processing season download in background: {show_title} ({len(episodes)} episodes)")
         
@@ -551,85 +738,71 @@ def process_season_downloads_background(episodes_data, show_title, selected_qual
         download_ids = []
         successful_downloads = 0
         
-        for i, episode in enumerate(episodes):
-            episode_link = episode.get('link')
-            episode_title = episode.get('title', 'Unknown_Episode')
-            
-            # Update processing status
-            season_processing[processing_id]['processed_episodes'] = i + 1
+        # Resolve all the episode download URLs concurrently, then queue them in episode order
+        with ThreadPoolExecutor(max_workers=SOURCE_URL_WORKERS) as executor:
+            url_futures = [
+                executor.submit(resolve_source_url, episode['link']) if episode.get('link') else None
+                for episode in episodes
+            ]
             
-            if not episode_link:
-                logger.warning(f"Skipping episode with no link: {episode_title}")
-                continue
-            
-            try:
-                # Get the download URL for this episode
-                url_endpoint = Endpoint(
-                    url=f'{API_BASE_URL}/sourceUrl', 
-                    headers=DEFAULT_HEADERS, 
-                    method='POST', 
-                    payload={"url": episode_link, "seriesType": "episode"}
-                )
-                response_data, status_code, _ = url_endpoint.fetch()
-                
-                if status_code != 200 or not response_data.get('sourceUrl'):
-                    logger.error(f"Could not get download URL for episode: {episode_title}")
-                    continue
-                
-                direct_download_url = unquote(response_data['sourceUrl'])
-                # Use context-based filename generation for better formatting
-                if selected_quality:
-                    safe_filename = create_episode_filename_from_context(show_title, episode_title, selected_quality, f"{episode_title}.mp4")
-                else:
-                    safe_filename = sanitize_filename(f"{show_title}_{episode_title}.mp4")
-                download_id = str(uuid.uuid4())
-                
-                download_progress[download_id] = {
-                    'status': 'queued', 
-                    'progress': 0, 
-                    'speed': '0 KB/s', 
-                    'size': '0 MB', 
-                    'downloaded': 0, 
-                    'total': 0, 
-                    'start_time': time.time(), 
-                    'filename': safe_filename, 
-                    'error': None,
-                    'is_season_download': True,
-                    'season_processing_id': processing_id
-                }
+            for i, (episode, url_future) in enumerate(zip(episodes, url_futures)):
+                episode_title = episode.get('title', 'Unknown_Episode')
                 
-                download_ids.append(download_id)
+                # Update processing status
+                update_season(processing_id, {'processed_episodes': i + 1})
                 
-                # Queue download instead of starting immediately to respect concurrency limits
-                queue_download(download_id, direct_download_url, safe_filename)
-                
-                successful_downloads += 1
-                season_processing[processing_id]['successful_downloads'] = successful_downloads
-                logger.info(f"Queued download {successful_downloads}/{len(episodes)}: {safe_filename}")
-                
-                # Small delay between queuing downloads
-                time.sleep(0.2)
+                if url_future is None:
+                    logger.warning(f"Skipping episode with no link: {episode_title}")
+                    continue
                 
-            except Exception as e:
-                logger.error(f"Error setting up download for episode {episode_title}: {str(e)}")
-                continue
+                try:
+                    direct_download_url = url_future.result()
+                    if not direct_download_url:
+                        logger.error(f"Could not get download URL for episode: {episode_title}")
+                        continue
+                    
+                    # Use context-based filename generation for better formatting
+                    if selected_quality:
+                        safe_filename = create_episode_filename_from_context(show_title, episode_title, selected_quality, f"{episode_title}.mp4")
+                    else:
+                        safe_filename = sanitize_filename(f"{show_title}_{episode_title}.mp4")
+                    download_id = secrets.token_hex(16)
+                    
+                    track_download(download_id, {
+                        'status': 'queued', 
+                        'progress': 0, 
+                        'speed': '0 KB/s', 
+                        'size': '0 MB', 
+                        'downloaded': 0, 
+                        'total': 0, 
+                        'start_time': time.time(), 
+                        'filename': safe_filename, 
+                        'error': None,
+                        'is_season_download': True,
+                        'season_processing_id': processing_id
+                    })
+                    
+                    download_ids.append(download_id)
+                    
+                    # Queue download instead of starting immediately to respect concurrency limits
+                    queue_download(download_id, direct_download_url, safe_filename)
+                    
+                    successful_downloads += 1
+                    update_season(processing_id, {'successful_downloads': successful_downloads})
+                    logger.info(f"Queued download {successful_downloads}/{len(episodes)}: {safe_filename}")
+                    
+                except Exception as e:
+                    logger.error(f"Error setting up download for episode {episode_title}: {str(e)}")
+                    continue
         
         # Mark processing as completed
-        season_processing[processing_id]['status'] = 'completed'
-        season_processing[processing_id]['end_time'] = time.time()
+        update_season(processing_id, {'status': 'completed', 'end_time': time.time()})
         
         logger.info(f"Completed season download setup: {successful_downloads} episodes queued for {show_title}")
         
-    except json.JSONDecodeError:
-        logger.error("Invalid JSON data for episodes in background processing")
-        if processing_id in season_processing:
-            season_processing[processing_id]['status'] = 'error'
-            season_processing[processing_id]['error'] = 'Invalid JSON data'
     except Exception as e:
         logger.error(f"Season background processing error: {str(e)}")
-        if processing_id in season_processing:
-            season_processing[processing_id]['status'] = 'error'
-            season_processing[processing_id]['error'] = str(e)
+        update_season(processing_id, {'status': 'error', 'error': str(e)})
 
 @app.route('/download_all_season', methods=['POST'])
 @require_auth
@@ -644,27 +817,21 @@ def download_all_season():
         return redirect(url_for('index'))
     
     try:
-        import json
-        episodes = json.loads(episodes_data)
+        episodes = orjson.loads(episodes_data)
         
         if not episodes or not isinstance(episodes, list):
             flash("Error: Invalid episodes data.", "error")
             return redirect(url_for('index'))
         
         # Start background processing
-        thread = threading.Thread(
-            target=process_season_downloads_background, 
-            args=(episodes_data, show_title, selected_quality)
-        )
-        thread.daemon = True
-        thread.start()
+        season_pool.submit(process_season_downloads_background, episodes, show_title, selected_quality)
         
         flash(f"Started processing {len(episodes)} episodes from {show_title} in the background. Downloads will appear in the downloads page as they are prepared.", "info")
         logger.info(f"Started background season processing for: {show_title} ({len(episodes)} episodes)")
         
         return redirect(url_for('downloads_page'))
         
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         flash("Error: Invalid episode data format.", "error")
         return redirect(url_for('index'))
     except Exception as e:
@@ -685,20 +852,14 @@ def download_selected_episodes():
         return redirect(url_for('index'))
     
     try:
-        import json
-        selected_episodes = json.loads(selected_episodes_data)
+        selected_episodes = orjson.loads(selected_episodes_data)
         
         if not selected_episodes or not isinstance(selected_episodes, list):
             flash("Error: Invalid episode selection data.", "error")
             return redirect(url_for('index'))
         
         # Start background processing for selected episodes
-        thread = threading.Thread(
-            target=process_season_downloads_background, 
-            args=(selected_episodes_data, show_title, selected_quality)
-        )
-        thread.daemon = True
-        thread.start()
+        season_pool.submit(process_season_downloads_background, selected_episodes, show_title, selected_quality)
         
         episode_count = len(selected_episodes)
         flash(f"Started processing {episode_count} selected episode{'s' if episode_count != 1 else ''} from {show_title} in the background. Downloads will appear in the downloads page as they are prepared.", "info")
@@ -706,7 +867,7 @@ def download_selected_episodes():
         
         return redirect(url_for('downloads_page'))
         
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         flash("Error: Invalid episode selection format.", "error")
         return redirect(url_for('index'))
     except Exception as e:
@@ -718,14 +879,19 @@ def download_selected_episodes():
 @require_auth
 def list_downloads():
     downloads = []
-    sorted_ids = sorted(download_progress.keys(), key=lambda k: download_progress[k]['start_time'], reverse=True)
-    for download_id in sorted_ids:
-        progress = download_progress[download_id]
-        downloads.append({'id': download_id, 'filename': progress.get('filename', 'Unknown'), 'status': progress.get('status', 'unknown'), 'progress': f"{progress.get('progress', 0):.2f}", 'size': progress.get('size', '0 MB'), 'speed': progress.get('speed', '0 KB/s'), 'error': progress.get('error')})
+    # Copy under the lock so worker threads can keep updating download_progress;
+    # insertion order is start order, so reversing gives newest first
+    with progress_lock:
+        snapshot = [(download_id, progress.copy()) for download_id, progress in reversed(download_progress.items())]
+        version = progress_version
+    for download_id, progress in snapshot:
+        downloads.append(download_summary(download_id, progress))
     
     # Add season processing status
     season_processing_list = []
-    for processing_id, processing_info in season_processing.items():
+    with season_processing_lock:
+        season_snapshot = [(processing_id, info.copy()) for processing_id, info in season_processing.items()]
+    for processing_id, processing_info in season_snapshot:
         season_processing_list.append({
             'id': processing_id,
             'show_title': processing_info.get('show_title', 'Unknown'),
@@ -737,26 +903,79 @@ def list_downloads():
             'error': processing_info.get('error')
         })
     
-    return jsonify({
+    # orjson serializes straight to bytes; this endpoint is polled by the downloads page
+    response = Response(orjson.dumps({
         "downloads": downloads,
+        "version": version,
         "season_processing": season_processing_list,
         "queue_status": {
             "active_downloads": len(active_downloads),
             "max_concurrent": MAX_CONCURRENT_DOWNLOADS,
-            "queued_downloads": download_queue.qsize(),
+            "source_url_workers": SOURCE_URL_WORKERS,
+            "queued_downloads": len(download_queue),
             "available_slots": MAX_CONCURRENT_DOWNLOADS - len(active_downloads)
         }
-    })
+    }), mimetype='application/json')
+    # Pollers that send back the ETag get an empty 304 while nothing has changed
+    response.add_etag()
+    return response.make_conditional(request)
+
+def streaming_supported():
+    """Return True if holding a /downloads/stream response open won't tie up a whole worker."""
+    if not request.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn'):
+        return True  # The dev server runs each request in its own thread
+    # A sync Gunicorn worker serves one request at a time, so one open tab would block every route
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('socket')
+
+@app.route('/downloads/stream')
+@require_auth
+def stream_downloads():
+    """Stream download progress updates as Server-Sent Events."""
+    if not streaming_supported():
+        # 204 tells EventSource not to reconnect; the page polls /downloads instead
+        return Response(status=204)
+    
+    def generate():
+        subscriber = queue.Queue(maxsize=SSE_QUEUE_SIZE)
+        with progress_subscribers_lock:
+            progress_subscribers.append(subscriber)
+        try:
+            while True:
+                try:
+                    message = subscriber.get(timeout=SSE_HEARTBEAT_INTERVAL)
+                    yield b'data: ' + message + b'\n\n'
+                except queue.Empty:
+                    yield b': keepalive\n\n'
+        finally:
+            with progress_subscribers_lock:
+                progress_subscribers.remove(subscriber)
+    
+    # X-Accel-Buffering stops nginx from holding events back
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/download_file/<location>/<path:filename>')
 @require_auth
 def download_file(location, filename):
+    # send_from_directory hands the open file to wsgi.file_wrapper (sendfile under Gunicorn)
+    # and, with conditional=True, answers Range and If-Modified-Since/ETag requests
     if location == 'downloads':
-        return send_from_directory(DOWNLOAD_DIR, filename, as_attachment=True)
+        directory = DOWNLOAD_DIR
     elif location == 'completed':
-        return send_from_directory(COMPLETED_DIR, filename, as_attachment=True)
+        directory = COMPLETED_DIR
     else:
         abort(404)
+    
+    if X_ACCEL_REDIRECT_PREFIX:
+        # Hand the transfer to nginx, which sendfile()s it from its internal location
+        if safe_join(directory, filename) is None:
+            abort(404)
+        response = Response(mimetype='application/octet-stream')
+        response.headers['X-Accel-Redirect'] = f"{X_ACCEL_REDIRECT_PREFIX}/{location}/{quote(filename)}"
+        response.headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(os.path.basename(filename))}"
+        return response
+    
+    return send_from_directory(directory, filename, as_attachment=True, conditional=True)
 
 @app.route('/delete_file', methods=['POST'])
 @require_auth
@@ -764,9 +983,7 @@ def delete_file():
     filename = request.form.get('filename')
     location = request.form.get('location', 'downloads')
     
-    if not filename: 
-        abort(400)
-    if '..' in filename or filename.startswith('/'): 
+    if is_unsafe_filename(filename): 
         abort(400)
     
     # Determine the correct directory
@@ -779,14 +996,13 @@ def delete_file():
         return redirect(url_for('file_manager'))
     
     filepath = os.path.join(directory, filename)
-    if os.path.exists(filepath):
-        try:
-            os.remove(filepath)
-            flash(f"Successfully deleted '{filename}' from {location}", "success")
-        except Exception as e:
-            flash(f"Error deleting '{filename}': {e}", "danger")
-    else:
+    try:
+        os.remove(filepath)
+        flash(f"Successfully deleted '{filename}' from {location}", "success")
+    except FileNotFoundError:
         flash(f"File '{filename}' not found in {location}.", "warning")
+    except Exception as e:
+        flash(f"Error deleting '{filename}': {e}", "danger")
     
     return redirect(url_for('file_manager'))
 
@@ -795,26 +1011,34 @@ def delete_file():
 def move_to_completed():
     filename = request.form.get('filename')
     
-    if not filename:
-        abort(400)
-    if '..' in filename or filename.startswith('/'):
+    if is_unsafe_filename(filename):
         abort(400)
     
     source_path = os.path.join(DOWNLOAD_DIR, filename)
     dest_path = os.path.join(COMPLETED_DIR, filename)
     
-    if not os.path.exists(source_path):
-        flash(f"File '{filename}' not found in downloads directory.", "warning")
-        return redirect(url_for('file_manager'))
-    
-    if os.path.exists(dest_path):
-        flash(f"File '{filename}' already exists in completed directory.", "warning")
-        return redirect(url_for('file_manager'))
-    
     try:
-        shutil.move(source_path, dest_path)
+        # link() refuses an existing destination, so a file that appears there is never replaced
+        try:
+            os.link(source_path, dest_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # Different filesystem: claim the name with O_EXCL, then copy into it
+            # with copy2, which uses sendfile on Linux
+            open(dest_path, 'xb').close()
+            try:
+                shutil.copy2(source_path, dest_path)
+            except BaseException:
+                os.unlink(dest_path)
+                raise
+        os.unlink(source_path)
         flash(f"Successfully moved '{filename}' to completed directory.", "success")
         logger.info(f"Manually moved file to completed: {filename}")
+    except FileExistsError:
+        flash(f"File '{filename}' already exists in completed directory.", "warning")
+    except FileNotFoundError:
+        flash(f"File '{filename}' not found in downloads directory.", "warning")
     except Exception as e:
         flash(f"Error moving '{filename}' to completed directory: {e}", "danger")
         logger.error(f"Failed to manually move file: {filename}, Error: {e}")
@@ -829,78 +1053,223 @@ def queue_download(download_id, url, filename):
         if len(active_downloads) < MAX_CONCURRENT_DOWNLOADS:
             # Start download immediately
             active_downloads.add(download_id)
-            download_progress[download_id]['status'] = 'downloading'
-            thread = threading.Thread(target=managed_download_thread, args=(download_id, url, filename))
-            thread.daemon = True
-            thread.start()
+            update_download(download_id, {'status': 'downloading'})
+            download_pool.submit(managed_download_thread, download_id, url, filename)
+            publish_progress(download_id)
             logger.info(f"Started download immediately: {download_id} -> {filename}")
         else:
             # Add to queue
-            download_queue.put((download_id, url, filename))
-            download_progress[download_id]['status'] = 'queued'
-            logger.info(f"Queued download: {download_id} -> {filename} (Queue size: {download_queue.qsize()})")
+            download_queue.append((download_id, url, filename))
+            update_download(download_id, {'status': 'queued'})
+            publish_progress(download_id)
+            logger.info(f"Queued download: {download_id} -> {filename} (Queue size: {len(download_queue)})")
 
 def process_download_queue():
     """Process the download queue when a slot becomes available."""
     with queue_lock:
-        while len(active_downloads) < MAX_CONCURRENT_DOWNLOADS and not download_queue.empty():
-            try:
-                download_id, url, filename = download_queue.get_nowait()
-                active_downloads.add(download_id)
-                download_progress[download_id]['status'] = 'downloading'
-                thread = threading.Thread(target=managed_download_thread, args=(download_id, url, filename))
-                thread.daemon = True
-                thread.start()
-                logger.info(f"Started queued download: {download_id} -> {filename} (Queue size: {download_queue.qsize()})")
-            except queue.Empty:
-                break
+        while len(active_downloads) < MAX_CONCURRENT_DOWNLOADS and download_queue:
+            download_id, url, filename = download_queue.popleft()
+            active_downloads.add(download_id)
+            update_download(download_id, {'status': 'downloading'})
+            download_pool.submit(managed_download_thread, download_id, url, filename)
+            publish_progress(download_id)
+            logger.info(f"Started queued download: {download_id} -> {filename} (Queue size: {len(download_queue)})")
 
 def managed_download_thread(download_id, url, filename):
     """Wrapper for download_file_thread that manages the active downloads set."""
     try:
         download_file_thread(download_id, url, filename)
     finally:
+        # Send the final status (completed, error, ...) to live clients
+        publish_progress(download_id)
         # Always remove from active downloads when done, regardless of success/failure
         with queue_lock:
             active_downloads.discard(download_id)
+        app_data_dirty.set()
         # Process queue to start next download
         process_download_queue()
 
+FALLOC_FL_KEEP_SIZE = 1  # From <linux/falloc.h>: allocate blocks without changing the file size
+
+@lru_cache(maxsize=None)
+def libc_fallocate():
+    """Return libc's fallocate(), or None on platforms without it."""
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        fallocate = getattr(libc, 'fallocate64', None) or libc.fallocate
+    except (OSError, AttributeError):
+        return None
+    fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+    fallocate.restype = ctypes.c_int
+    return fallocate
+
+def preallocate_file(file, size):
+    """Set a new file's length to size, reserving its blocks where the filesystem can do that cheaply."""
+    file.truncate(size)
+    # Unlike posix_fallocate, which falls back to writing every 4 KiB block on NFS, CIFS
+    # and older ZFS, the raw call just fails there and the file stays sparse
+    fallocate = libc_fallocate()
+    if fallocate is not None and fallocate(file.fileno(), FALLOC_FL_KEEP_SIZE, 0, size) != 0:
+        logger.debug(f"fallocate not supported here ({os.strerror(ctypes.get_errno())}), leaving the file sparse")
+
+class RangeNotHonored(Exception):
+    """Raised when a host answers a Range request with the whole file."""
+
+def copy_stream(response, file, total_size, on_progress):
+    """Copy a streamed response body into file, preallocating Content-Length bytes."""
+    if total_size > 0:
+        preallocate_file(file, total_size)
+    response.raw.decode_content = True
+    read = response.raw.read
+    while True:
+        chunk = read(DOWNLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        file.write(chunk)
+        on_progress()
+    if file.tell() != total_size:
+        # Drop preallocated space the body never filled
+        file.truncate()
+
+def download_ranges(url, file, total_size, part_bytes, first_response, on_progress):
+    """Fetch url as len(part_bytes) parallel parts written at their offsets; returns False if the host ignores Range."""
+    parts = len(part_bytes)
+    part_size = -(-total_size // parts)
+    # Size the file up front so every part can write at its own offset
+    preallocate_file(file, total_size)
+    fd = file.fileno()
+    stop = threading.Event()  # Set when any part fails, so the others give up early
+    
+    def copy_part(index, response):
+        start = index * part_size
+        end = min(start + part_size, total_size) - 1
+        offset = start
+        while offset <= end and not stop.is_set():
+            chunk = response.raw.read(min(DOWNLOAD_CHUNK_SIZE, end + 1 - offset))
+            if not chunk:
+                break
+            view = memoryview(chunk)
+            while view:
+                written = os.pwrite(fd, view, offset)
+                view = view[written:]
+                offset += written
+            part_bytes[index] = offset - start
+            on_progress()
+        if offset != end + 1 and not stop.is_set():
+            raise requests.exceptions.RequestException(f"Part {index + 1} ended early at byte {offset}")
+    
+    def first_part():
+        # The probe response already streams from byte 0, so it serves the first part
+        try:
+            copy_part(0, first_response)
+        finally:
+            first_response.close()
+    
+    def fetch_part(index):
+        start = index * part_size
+        end = min(start + part_size, total_size) - 1
+        with DOWNLOAD_SESSION.get(url, headers={'Range': f'bytes={start}-{end}'}, stream=True, timeout=(10, 60)) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise RangeNotHonored(f"Range request for part {index + 1} returned {response.status_code}")
+            copy_part(index, response)
+    
+    with ThreadPoolExecutor(max_workers=parts, thread_name_prefix='range') as executor:
+        futures = [executor.submit(first_part)] + [executor.submit(fetch_part, index) for index in range(1, parts)]
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        error = next((future.exception() for future in futures if future in done and future.exception()), None)
+        if error:
+            stop.set()
+            for future in futures:
+                future.cancel()
+    if isinstance(error, RangeNotHonored):
+        logger.warning(f"{error}; falling back to a single stream")
+        return False
+    if error:
+        raise error
+    return True
+
 def download_file_thread(download_id, url, filename):
     try:
-        download_progress[download_id]['status'] = 'downloading'
+        update_download(download_id, {'status': 'downloading'})
         # Always use our clean filename, ignore any server-provided filename
         file_path = os.path.join(DOWNLOAD_DIR, filename)
         logger.info(f"Starting download: {download_id} -> {filename}")
         
         # Ensure the filename is exactly what we want by creating the file directly
-        with requests.get(url, stream=True, timeout=60) as response:
+        # Fail fast on connect, but tolerate slow reads from busy file hosts
+        with DOWNLOAD_SESSION.get(url, stream=True, timeout=(10, 60)) as response:
             response.raise_for_status()
             total_size = int(response.headers.get('content-length', 0))
-            download_progress[download_id]['total'] = total_size
-            downloaded = 0
-            start_time = time.time()
+            update_download(download_id, {'total': total_size})
+            total_size_str = format_size(total_size)
+            start_time = time.monotonic()  # Only used for intervals, so immune to clock changes
+            last_sample = [start_time, 0]  # (time, bytes) of the previous progress update
+            
+            report_lock = threading.Lock()
+            next_report = [time.monotonic() + PROGRESS_UPDATE_INTERVAL]
+            
+            def report_progress():
+                # Called after every chunk; updates at most once per interval, and only one part at a time
+                now = time.monotonic()
+                if now < next_report[0] or not report_lock.acquire(blocking=False):
+                    return
+                try:
+                    next_report[0] = now + PROGRESS_UPDATE_INTERVAL
+                    update_progress(get_downloaded())
+                finally:
+                    report_lock.release()
+            
+            def update_progress(downloaded, final=False):
+                # Report the speed over the last update window, or the average once finished
+                current_time = time.monotonic()
+                since_time, since_bytes = (start_time, 0) if final else last_sample
+                elapsed = current_time - since_time
+                speed = ((downloaded - since_bytes) / elapsed) if elapsed > 0 else 0
+                last_sample[:] = [current_time, downloaded]
+                progress = (downloaded / total_size * 100) if total_size > 0 else 0
+                update_download(download_id, {'progress': progress, 'downloaded': downloaded, 'speed': format_speed(speed), 'size': total_size_str})
+                publish_progress(download_id)
+            
+            use_ranges = (RANGE_DOWNLOAD_PARTS > 1 and total_size >= RANGE_DOWNLOAD_MIN_SIZE
+                          and response.headers.get('accept-ranges') == 'bytes')
             
             # Create the file with our exact filename, ignoring Content-Disposition
-            with open(file_path, 'wb') as file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        file.write(chunk)
-                        downloaded += len(chunk)
-                        current_time = time.time()
-                        elapsed = current_time - start_time
-                        speed = (downloaded / elapsed) if elapsed > 0 else 0
-                        progress = (downloaded / total_size * 100) if total_size > 0 else 0
-                        download_progress[download_id].update({'progress': progress, 'downloaded': downloaded, 'speed': format_speed(speed), 'size': format_size(total_size)})
+            try:
+                with open(file_path, 'wb', buffering=DOWNLOAD_CHUNK_SIZE) as file:
+                    if use_ranges:
+                        part_bytes = [0] * RANGE_DOWNLOAD_PARTS
+                        get_downloaded = lambda: sum(part_bytes)
+                    else:
+                        get_downloaded = file.tell
+                    
+                    if not use_ranges:
+                        copy_stream(response, file, total_size, report_progress)
+                    elif not download_ranges(url, file, total_size, part_bytes, response, report_progress):
+                        # The host ignored Range after all: start over with one plain stream
+                        file.seek(0)
+                        file.truncate()
+                        get_downloaded = file.tell
+                        with DOWNLOAD_SESSION.get(url, stream=True, timeout=(10, 60)) as retry_response:
+                            retry_response.raise_for_status()
+                            copy_stream(retry_response, file, total_size, report_progress)
+                    update_progress(get_downloaded(), final=True)
+            except BaseException:
+                # The file was sized up front, so a failed download would leave a full-length, partly zero-filled file
+                try:
+                    os.unlink(file_path)
+                except OSError:
+                    pass
+                raise
         
         # Download completed successfully - file should already have our clean filename
-        download_progress[download_id].update({'status': 'moving', 'progress': 100})
+        update_download(download_id, {'status': 'moving', 'progress': 100})
         logger.info(f"Download completed with clean filename: {download_id} - {filename}")
         
         # Verify the file exists with our expected name
         if not os.path.exists(file_path):
             logger.error(f"Downloaded file not found at expected path: {file_path}")
-            download_progress[download_id].update({'status': 'error', 'error': 'File not found after download'})
+            update_download(download_id, {'status': 'error', 'error': 'File not found after download'})
             return
         
         # Move file to completed directory if auto-move is enabled (for Sonarr integration)
@@ -908,24 +1277,28 @@ def download_file_thread(download_id, url, filename):
             try:
                 completed_file_path = os.path.join(COMPLETED_DIR, filename)
                 shutil.move(file_path, completed_file_path)
-                download_progress[download_id]['status'] = 'completed'
-                download_progress[download_id]['completed_path'] = completed_file_path
+                update_download(download_id, {'status': 'completed', 'completed_path': completed_file_path})
                 logger.info(f"File moved to completed directory: {filename}")
             except Exception as e:
                 logger.error(f"Failed to move file to completed directory: {e}")
-                download_progress[download_id]['move_error'] = str(e)
-                # File stays in downloads directory if move fails
+                # File stays in downloads directory if move fails, but the download itself is done
+                update_download(download_id, {'status': 'completed', 'move_error': str(e)})
+        else:
+            update_download(download_id, {'status': 'completed'})
         
-    except requests.exceptions.RequestException as e:
-        download_progress[download_id].update({'status': 'error', 'error': f'Network error: {str(e)}'})
+    except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError) as e:
+        # Reading response.raw surfaces urllib3's own errors, unwrapped by requests
+        update_download(download_id, {'status': 'error', 'error': f'Network error: {str(e)}'})
     except Exception as e:
-        download_progress[download_id].update({'status': 'error', 'error': str(e)})
+        update_download(download_id, {'status': 'error', 'error': str(e)})
+
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
 
 def format_size(bytes_size):
     if bytes_size == 0: return "0 B"
-    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-        if bytes_size < 1024.0: return f"{bytes_size:.2f} {unit}"
-        bytes_size /= 1024.0
+    # Each unit is 2**10 of the previous one, so bit_length picks the unit directly
+    unit_index = min(max(int(bytes_size).bit_length() - 1, 0) // 10, len(SIZE_UNITS) - 1)
+    return f"{bytes_size / (1 << (unit_index * 10)):.2f} {SIZE_UNITS[unit_index]}"
 
 def format_speed(bytes_per_second):
     return f"{format_size(bytes_per_second)}/s"
@@ -952,13 +1325,15 @@ def init():
     
     # Create the directories if they don't exist
     for directory in [DOWNLOAD_DIR, COMPLETED_DIR, APP_DATA_FOLDER]:
-        if not directory.exists():
-            try:
-                directory.mkdir(parents=True, exist_ok=True)
-                logger.info(f"Created directory at: {directory}")
-            except OSError as e:
-                logger.error(f"FATAL: Could not create directory at '{directory}'. Please check permissions. Error: {e}")
-                # In a real app, you might want to exit here if the directory is critical
+        # A single mkdir call; an existing directory just raises FileExistsError
+        try:
+            directory.mkdir(parents=True)
+            logger.info(f"Created directory at: {directory}")
+        except FileExistsError:
+            pass
+        except OSError as e:
+            logger.error(f"FATAL: Could not create directory at '{directory}'. Please check permissions. Error: {e}")
+            # In a real app, you might want to exit here if the directory is critical
     
     load_data()
     
@@ -967,5 +1342,7 @@ def init():
 init()
 
 if __name__ == '__main__':
+    # Under Gunicorn the post_fork hook starts autosave inside the worker instead
+    start_autosave()
     # Only run the development server when called directly
     app.run(debug=DEBUG, host=HOST, port=PORT)
\ No newline at end of file
@@ -0,0 +1,7 @@
+"""Shared pytest configuration for the test suite."""
+
+import sys
+from pathlib import Path
+
+# Add the parent directory to the path to import main, once for every test module
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
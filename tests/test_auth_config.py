@@ -1,13 +1,9 @@
 """Tests for authentication and configuration."""
 
 import pytest
-import sys
 import os
 from unittest.mock import patch
 
-# Add the parent directory to the path to import main
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 import main
 
 
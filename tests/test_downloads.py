@@ -1,16 +1,15 @@
 """Tests for download functionality."""
 
 import pytest
+import io
+import errno
+import json
 import tempfile
 import os
-import sys
 from unittest.mock import Mock, patch, mock_open
 import threading
 import time
 
-# Add the parent directory to the path to import main
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 import main
 
 
@@ -26,13 +25,13 @@ class TestDownloadFunctionality:
             yield temp_dir
             main.DOWNLOAD_DIR = original_download_dir
     
-    @patch('main.requests.get')
+    @patch('main.DOWNLOAD_SESSION.get')
     def test_download_file_thread_success(self, mock_get, temp_download_dir):
         """Test successful file download."""
         # Mock the response
         mock_response = Mock()
         mock_response.headers = {'content-length': '1024'}
-        mock_response.iter_content.return_value = [b'test data chunk 1', b'test data chunk 2']
+        mock_response.raw = io.BytesIO(b'test data chunk 1test data chunk 2')
         mock_response.__enter__ = Mock(return_value=mock_response)
         mock_response.__exit__ = Mock(return_value=None)
         mock_get.return_value = mock_response
@@ -68,7 +67,142 @@ class TestDownloadFunctionality:
         # Clean up
         main.download_progress.clear()
     
-    @patch('main.requests.get')
+    @patch('main.ENABLE_AUTO_MOVE', False)
+    @patch('main.DOWNLOAD_SESSION.get')
+    def test_download_file_thread_trims_preallocation(self, mock_get, temp_download_dir):
+        """Test that a body shorter than Content-Length leaves no preallocated padding behind."""
+        mock_response = Mock()
+        mock_response.headers = {'content-length': '1024'}
+        mock_response.raw = io.BytesIO(b'short body')
+        mock_response.__enter__ = Mock(return_value=mock_response)
+        mock_response.__exit__ = Mock(return_value=None)
+        mock_get.return_value = mock_response
+        
+        main.track_download('test-short-id', {'status': 'starting', 'start_time': time.time(), 'filename': 's.mp4', 'error': None})
+        main.download_file_thread('test-short-id', 'http://example.com/s.mp4', 's.mp4')
+        
+        with open(os.path.join(temp_download_dir, 's.mp4'), 'rb') as f:
+            assert f.read() == b'short body'
+        
+        # Clean up
+        main.download_progress.clear()
+    
+    @patch('main.ENABLE_AUTO_MOVE', False)
+    @patch('main.RANGE_DOWNLOAD_MIN_SIZE', 16)
+    @patch('main.RANGE_DOWNLOAD_PARTS', 3)
+    @patch('main.DOWNLOAD_SESSION.get')
+    def test_download_file_thread_parallel_ranges(self, mock_get, temp_download_dir):
+        """Test that large files from Range-capable hosts are fetched in parts and reassembled in order."""
+        data = bytes(range(256)) * 4
+        
+        def get(url, headers=None, **kwargs):
+            response = Mock()
+            if headers and 'Range' in headers:
+                start, end = map(int, headers['Range'][len('bytes='):].split('-'))
+                response.status_code = 206
+                response.raw = io.BytesIO(data[start:end + 1])
+            else:
+                response.status_code = 200
+                response.headers = {'content-length': str(len(data)), 'accept-ranges': 'bytes'}
+                response.raw = io.BytesIO(data)
+            response.__enter__ = Mock(return_value=response)
+            response.__exit__ = Mock(return_value=None)
+            return response
+        mock_get.side_effect = get
+        
+        main.track_download('test-range-id', {'status': 'starting', 'start_time': time.time(), 'filename': 'r.mp4', 'error': None})
+        main.download_file_thread('test-range-id', 'http://example.com/r.mp4', 'r.mp4')
+        
+        assert main.download_progress['test-range-id']['status'] == 'completed'
+        with open(os.path.join(temp_download_dir, 'r.mp4'), 'rb') as f:
+            assert f.read() == data
+        # The probe response supplies the first part, so only the other two are requested
+        assert mock_get.call_count == 3
+        
+        # Clean up
+        main.download_progress.clear()
+    
+    @patch('main.ENABLE_AUTO_MOVE', False)
+    @patch('main.RANGE_DOWNLOAD_MIN_SIZE', 16)
+    @patch('main.RANGE_DOWNLOAD_PARTS', 3)
+    @patch('main.DOWNLOAD_SESSION.get')
+    def test_download_file_thread_falls_back_when_range_ignored(self, mock_get, temp_download_dir):
+        """Test that a host answering a Range request with 200 is downloaded as one stream instead."""
+        data = bytes(range(256)) * 4
+        
+        def get(url, headers=None, **kwargs):
+            response = Mock()
+            response.status_code = 200
+            response.headers = {'content-length': str(len(data)), 'accept-ranges': 'bytes'}
+            response.raw = io.BytesIO(data)
+            response.__enter__ = Mock(return_value=response)
+            response.__exit__ = Mock(return_value=None)
+            return response
+        mock_get.side_effect = get
+        
+        main.track_download('test-fallback-id', {'status': 'starting', 'start_time': time.time(), 'filename': 'f.mp4', 'error': None})
+        main.download_file_thread('test-fallback-id', 'http://example.com/f.mp4', 'f.mp4')
+        
+        assert main.download_progress['test-fallback-id']['status'] == 'completed'
+        with open(os.path.join(temp_download_dir, 'f.mp4'), 'rb') as f:
+            assert f.read() == data
+        
+        # Clean up
+        main.download_progress.clear()
+    
+    @patch('main.ENABLE_AUTO_MOVE', False)
+    @patch('main.RANGE_DOWNLOAD_MIN_SIZE', 16)
+    @patch('main.RANGE_DOWNLOAD_PARTS', 3)
+    @patch('main.DOWNLOAD_SESSION.get')
+    def test_download_file_thread_stops_parts_after_a_failure(self, mock_get, temp_download_dir):
+        """Test that one failed part ends the download without waiting for the other parts."""
+        data = bytes(range(256)) * 4
+        
+        class SlowReader:
+            """Raw body that hands out one byte every 10 ms."""
+            def read(self, size):
+                time.sleep(0.01)
+                return b'x'
+        
+        def get(url, headers=None, **kwargs):
+            response = Mock()
+            if headers and headers['Range'].startswith(f'bytes={-(-len(data) // 3)}-'):
+                response.raise_for_status.side_effect = main.requests.exceptions.HTTPError('503 Server Error')
+            elif headers:
+                response.status_code = 206
+                response.raw = SlowReader()
+            else:
+                response.status_code = 200
+                response.headers = {'content-length': str(len(data)), 'accept-ranges': 'bytes'}
+                response.raw = SlowReader()
+            response.__enter__ = Mock(return_value=response)
+            response.__exit__ = Mock(return_value=None)
+            return response
+        mock_get.side_effect = get
+        
+        main.track_download('test-part-error-id', {'status': 'starting', 'start_time': time.time(), 'filename': 'e.mp4', 'error': None})
+        started = time.monotonic()
+        main.download_file_thread('test-part-error-id', 'http://example.com/e.mp4', 'e.mp4')
+        
+        assert main.download_progress['test-part-error-id']['status'] == 'error'
+        assert '503' in main.download_progress['test-part-error-id']['error']
+        # Reading the slow parts to the end would take over three seconds
+        assert time.monotonic() - started < 1
+        
+        # Clean up
+        main.download_progress.clear()
+    
+    def test_download_session_requests_identity_encoding(self):
+        """Test that downloads ask for the file as-is instead of gzip-encoded."""
+        request = main.DOWNLOAD_SESSION.prepare_request(main.requests.Request('GET', 'http://example.com/a.mp4'))
+        assert request.headers['Accept-Encoding'] == 'identity'
+
+    def test_download_session_pool_fits_all_range_parts(self):
+        """Test that the download pool keeps a connection for every part of every running download."""
+        adapter = main.DOWNLOAD_SESSION.get_adapter('https://example.com/a.mp4')
+        assert adapter._pool_maxsize >= main.MAX_CONCURRENT_DOWNLOADS * main.RANGE_DOWNLOAD_PARTS
+    
+    @patch('main.DOWNLOAD_SESSION.get')
     def test_download_file_thread_network_error(self, mock_get):
         """Test download failure due to network error."""
         # Mock a network error
@@ -101,6 +235,59 @@ class TestDownloadFunctionality:
         # Clean up
         main.download_progress.clear()
     
+    @patch('main.DOWNLOAD_SESSION.get')
+    def test_download_file_thread_stream_error_is_network_error(self, mock_get, temp_download_dir):
+        """Test that urllib3 errors raised while reading the body are reported as network errors."""
+        mock_response = Mock()
+        mock_response.headers = {'content-length': '1024'}
+        mock_response.raw.read.side_effect = main.urllib3.exceptions.ProtocolError('Connection broken')
+        mock_response.__enter__ = Mock(return_value=mock_response)
+        mock_response.__exit__ = Mock(return_value=None)
+        mock_get.return_value = mock_response
+        
+        main.track_download('test-broken-id', {'status': 'starting', 'start_time': time.time(), 'filename': 'b.mp4', 'error': None})
+        main.download_file_thread('test-broken-id', 'http://example.com/b.mp4', 'b.mp4')
+        
+        assert main.download_progress['test-broken-id']['status'] == 'error'
+        assert main.download_progress['test-broken-id']['error'].startswith('Network error')
+        # The preallocated, mostly empty file is not left behind under the real name
+        assert not os.path.exists(os.path.join(temp_download_dir, 'b.mp4'))
+        
+        # Clean up
+        main.download_progress.clear()
+    
+    def test_preallocate_file_without_fallocate(self, tmp_path):
+        """Test that preallocation still sets the length where fallocate is unavailable."""
+        path = tmp_path / 'p.mp4'
+        with patch('main.libc_fallocate', return_value=None), open(path, 'wb') as f:
+            main.preallocate_file(f, 4096)
+            assert f.tell() == 0
+        
+        assert path.stat().st_size == 4096
+    
+    @patch('main.ENABLE_AUTO_MOVE', False)
+    @patch('main.PROGRESS_UPDATE_INTERVAL', 0)
+    @patch('main.DOWNLOAD_SESSION.get')
+    def test_download_file_thread_reports_progress_from_copy_loop(self, mock_get, temp_download_dir):
+        """Test that progress is published while copying, without a reporter thread."""
+        mock_response = Mock()
+        mock_response.headers = {'content-length': str(3 * main.DOWNLOAD_CHUNK_SIZE)}
+        mock_response.raw = io.BytesIO(b'x' * (3 * main.DOWNLOAD_CHUNK_SIZE))
+        mock_response.__enter__ = Mock(return_value=mock_response)
+        mock_response.__exit__ = Mock(return_value=None)
+        mock_get.return_value = mock_response
+        
+        main.track_download('test-report-id', {'status': 'starting', 'start_time': time.time(), 'filename': 'p.mp4', 'error': None})
+        with patch('main.publish_progress') as mock_publish, patch('main.threading.Thread') as mock_thread:
+            main.download_file_thread('test-report-id', 'http://example.com/p.mp4', 'p.mp4')
+        
+        mock_thread.assert_not_called()
+        # One update per chunk with no throttle, plus the final one
+        assert mock_publish.call_count == 4
+        
+        # Clean up
+        main.download_progress.clear()
+    
     def test_download_progress_tracking(self):
         """Test download progress tracking functionality."""
         download_id = 'test-progress-id'
@@ -192,6 +379,309 @@ class TestDownloadFunctionality:
         # Clean up
         main.download_progress.clear()
 
+    def test_list_downloads_newest_first(self):
+        """Test that /downloads returns the most recently started downloads first."""
+        now = time.time()
+        for i in range(3):
+            main.download_progress[f'download-{i}'] = {
+                'status': 'downloading',
+                'progress': 0,
+                'speed': '0 KB/s',
+                'size': '0 MB',
+                'downloaded': 0,
+                'total': 0,
+                'start_time': now + i,
+                'filename': f'Test.Show.S01E{i+1:02d}.720p.mp4',
+                'error': None
+            }
+        
+        main.app.config['TESTING'] = True
+        with main.app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess['authenticated'] = True
+            response = client.get('/downloads')
+        
+        assert response.status_code == 200
+        ids = [d['id'] for d in response.get_json()['downloads']]
+        assert ids == ['download-2', 'download-1', 'download-0']
+        
+        # Clean up
+        main.download_progress.clear()
+
+    @patch('main.MAX_TRACKED_DOWNLOADS', 3)
+    def test_track_download_evicts_oldest_finished(self):
+        """Test that tracking past the cap drops the oldest finished downloads only."""
+        statuses = ['downloading', 'completed', 'error', 'completed']
+        for i, status in enumerate(statuses):
+            main.track_download(f'download-{i}', {'status': status, 'start_time': time.time()})
+        
+        # Only one entry is over the cap, so only the oldest finished one goes
+        assert list(main.download_progress) == ['download-0', 'download-2', 'download-3']
+        
+        # Clean up
+        main.download_progress.clear()
+
+    @patch('main.MAX_TRACKED_SEASONS', 2)
+    def test_track_season_evicts_oldest_finished(self):
+        """Test that season jobs past the cap drop the oldest finished ones only."""
+        main.season_processing.clear()
+        for i, status in enumerate(['processing', 'completed', 'processing']):
+            main.track_season(f'season-{i}', {'status': status})
+        
+        assert list(main.season_processing) == ['season-0', 'season-2']
+        
+        # Clean up
+        main.season_processing.clear()
+
+    def test_update_season_ignores_evicted_jobs(self):
+        """Test that updates to a season job are applied in place and dropped once it is evicted."""
+        main.season_processing.clear()
+        main.track_season('season-0', {'status': 'processing', 'processed_episodes': 0})
+        main.update_season('season-0', {'processed_episodes': 3})
+        assert main.season_processing['season-0']['processed_episodes'] == 3
+        
+        main.season_processing.clear()
+        main.update_season('season-0', {'status': 'completed'})
+        assert 'season-0' not in main.season_processing
+
+    @patch('main.MAX_CONCURRENT_DOWNLOADS', 1)
+    @patch('main.download_pool')
+    def test_download_queue_starts_in_fifo_order(self, mock_pool):
+        """Test that queued downloads wait for a free slot and start oldest first."""
+        with patch('main.active_downloads', set()), patch('main.download_queue', main.deque()):
+            for i in range(3):
+                main.track_download(f'download-{i}', {'status': 'starting', 'start_time': time.time(), 'filename': f'{i}.mp4', 'error': None})
+                main.queue_download(f'download-{i}', f'http://example.com/{i}.mp4', f'{i}.mp4')
+            
+            assert list(main.download_queue) == [('download-1', 'http://example.com/1.mp4', '1.mp4'),
+                                                 ('download-2', 'http://example.com/2.mp4', '2.mp4')]
+            assert main.download_progress['download-1']['status'] == 'queued'
+            
+            main.active_downloads.discard('download-0')
+            main.process_download_queue()
+            
+            assert [call.args[1] for call in mock_pool.submit.call_args_list] == ['download-0', 'download-1']
+            assert list(main.download_queue) == [('download-2', 'http://example.com/2.mp4', '2.mp4')]
+        
+        # Clean up
+        main.download_progress.clear()
+
+    def test_download_file_conditional_request(self, temp_download_dir):
+        """Test that re-requesting an unchanged file returns 304 Not Modified."""
+        with open(os.path.join(temp_download_dir, 'Test.Show.S01E01.720p.mp4'), 'wb') as f:
+            f.write(b'test data')
+        
+        main.app.config['TESTING'] = True
+        with main.app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess['authenticated'] = True
+            url = '/download_file/downloads/Test.Show.S01E01.720p.mp4'
+            first = client.get(url)
+            assert first.status_code == 200
+            assert first.data == b'test data'
+            etag = first.headers['ETag']
+            first.close()
+            
+            second = client.get(url, headers={'If-None-Match': etag})
+            assert second.status_code == 304
+
+    @patch('main.X_ACCEL_REDIRECT_PREFIX', '/protected')
+    def test_download_file_x_accel_redirect(self, temp_download_dir):
+        """Test that download_file hands the transfer to nginx when X-Accel-Redirect is configured."""
+        main.app.config['TESTING'] = True
+        with main.app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess['authenticated'] = True
+            response = client.get('/download_file/downloads/Test Show S01E01.mp4')
+        
+        assert response.status_code == 200
+        assert response.data == b''
+        assert response.headers['X-Accel-Redirect'] == '/protected/downloads/Test%20Show%20S01E01.mp4'
+        assert 'attachment' in response.headers['Content-Disposition']
+
+    def test_move_to_completed_keeps_existing_and_missing_files(self, temp_download_dir, tmp_path):
+        """Test that move_to_completed never overwrites a completed file and reports missing ones."""
+        with open(os.path.join(temp_download_dir, 'a.mp4'), 'wb') as f:
+            f.write(b'new')
+        with open(tmp_path / 'a.mp4', 'wb') as f:
+            f.write(b'old')
+        
+        main.app.config['TESTING'] = True
+        with patch('main.COMPLETED_DIR', str(tmp_path)), main.app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess['authenticated'] = True
+            client.post('/move_to_completed', data={'filename': 'a.mp4'})
+            client.post('/move_to_completed', data={'filename': 'missing.mp4'})
+            response = client.post('/move_to_completed', data={'filename': 'sub/a.mp4'})
+        
+        assert (tmp_path / 'a.mp4').read_bytes() == b'old'
+        assert os.path.exists(os.path.join(temp_download_dir, 'a.mp4'))
+        assert not (tmp_path / 'missing.mp4').exists()
+        # A path whose directories don't exist is reported, not a server error
+        assert response.status_code == 302
+
+    def test_save_data_writes_app_data_file(self, tmp_path):
+        """Test that save_data atomically writes the current downloads to disk."""
+        main.download_progress['test-save-id'] = {'status': 'completed', 'start_time': 1.0, 'filename': 'a.mp4'}
+        
+        with patch('main.APP_DATA_FOLDER', tmp_path), patch('main.APP_DATA_FILE', tmp_path / 'app_data.json'):
+            main.save_data()
+        
+        saved = json.loads((tmp_path / 'app_data.json').read_text())
+        assert saved['download_progress']['test-save-id']['filename'] == 'a.mp4'
+        assert not (tmp_path / 'app_data.tmp').exists()
+        
+        # Clean up
+        main.download_progress.clear()
+
+    def test_save_data_skips_while_another_process_saves(self, tmp_path):
+        """Test that save_data leaves the data file alone while another process holds the temp file lock."""
+        main.download_progress['test-save-id'] = {'status': 'completed', 'start_time': 1.0, 'filename': 'a.mp4'}
+        
+        with open(tmp_path / 'app_data.tmp', 'ab') as other_writer:
+            main.fcntl.flock(other_writer.fileno(), main.fcntl.LOCK_EX)
+            with patch('main.APP_DATA_FOLDER', tmp_path), patch('main.APP_DATA_FILE', tmp_path / 'app_data.json'):
+                main.save_data()
+        
+        assert not (tmp_path / 'app_data.json').exists()
+        assert not (tmp_path / 'app_data.lock').exists()
+        # The skipped save leaves the data dirty for the next autosave
+        assert main.app_data_dirty.is_set()
+        
+        # Clean up
+        main.download_progress.clear()
+
+    def test_save_data_skips_when_temp_file_renamed_away(self, tmp_path):
+        """Test that a temp file renamed by another process mid-save is a skip, not a failure."""
+        main.download_progress['test-save-id'] = {'status': 'completed', 'start_time': 1.0, 'filename': 'a.mp4'}
+        real_stat = os.stat
+        
+        def stat(path, *args, **kwargs):
+            if str(path).endswith('app_data.tmp'):
+                raise FileNotFoundError(path)
+            return real_stat(path, *args, **kwargs)
+        
+        with patch('main.APP_DATA_FOLDER', tmp_path), patch('main.APP_DATA_FILE', tmp_path / 'app_data.json'), \
+                patch('main.os.stat', side_effect=stat), patch('main.logger') as mock_logger:
+            main.save_data()
+        
+        assert not (tmp_path / 'app_data.json').exists()
+        mock_logger.error.assert_not_called()
+        assert main.app_data_dirty.is_set()
+        
+        # Clean up
+        main.download_progress.clear()
+
+    def test_save_data_clears_dirty_flag_set_by_changes(self, tmp_path):
+        """Test that tracked changes mark app data dirty and a save marks it clean."""
+        main.track_download('test-dirty-id', {'status': 'queued', 'start_time': 1.0, 'filename': 'a.mp4'})
+        assert main.app_data_dirty.is_set()
+        
+        with patch('main.APP_DATA_FOLDER', tmp_path), patch('main.APP_DATA_FILE', tmp_path / 'app_data.json'):
+            main.save_data()
+        assert not main.app_data_dirty.is_set()
+        
+        main.update_download('test-dirty-id', {'status': 'downloading'})
+        assert main.app_data_dirty.is_set()
+        
+        # Clean up
+        main.download_progress.clear()
+
+    def test_publish_progress_notifies_stream_subscribers(self):
+        """Test that progress changes are pushed to /downloads/stream subscribers."""
+        subscriber = main.queue.Queue()
+        main.progress_subscribers.append(subscriber)
+        try:
+            main.track_download('test-stream-id', {'status': 'queued', 'progress': 0, 'start_time': time.time(), 'filename': 'a.mp4', 'error': None})
+            message = json.loads(subscriber.get_nowait())
+        finally:
+            main.progress_subscribers.remove(subscriber)
+        
+        assert message['id'] == 'test-stream-id'
+        assert message['status'] == 'queued'
+        assert message['progress'] == '0.00'
+        assert message['version'] == main.progress_version
+        
+        # Clean up
+        main.download_progress.clear()
+
+    @patch('main.MAX_TRACKED_DOWNLOADS', 1)
+    def test_evicted_downloads_are_pushed_as_removed(self):
+        """Test that stream subscribers are told when an old download is evicted."""
+        main.track_download('old-id', {'status': 'completed', 'start_time': time.time()})
+        subscriber = main.queue.Queue()
+        main.progress_subscribers.append(subscriber)
+        try:
+            main.track_download('new-id', {'status': 'queued', 'start_time': time.time()})
+            removed = json.loads(subscriber.get_nowait())
+            added = json.loads(subscriber.get_nowait())
+        finally:
+            main.progress_subscribers.remove(subscriber)
+        
+        assert removed == {'id': 'old-id', 'removed': True, 'version': main.progress_version}
+        assert added['id'] == 'new-id'
+        assert added['version'] == removed['version']
+        
+        # Clean up
+        main.download_progress.clear()
+
+    def test_downloads_stream_disabled_on_sync_worker(self):
+        """Test that a sync Gunicorn worker gets the polling page instead of an open stream."""
+        main.app.config['TESTING'] = True
+        with main.app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess['authenticated'] = True
+            environ = {'SERVER_SOFTWARE': 'gunicorn/23.0.0'}
+            stream = client.get('/downloads/stream', environ_base=environ)
+            page = client.get('/downloads_page', environ_base=environ)
+        
+        assert stream.status_code == 204
+        assert b'EventSource(' in page.data
+        assert b'if (!false ||' in page.data
+
+    def test_move_to_completed_across_filesystems(self, temp_download_dir, tmp_path):
+        """Test that move_to_completed copies and removes the source when link hits EXDEV."""
+        source = os.path.join(temp_download_dir, 'a.mp4')
+        with open(source, 'wb') as f:
+            f.write(b'video data')
+        
+        main.app.config['TESTING'] = True
+        with patch('main.COMPLETED_DIR', str(tmp_path)), main.app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess['authenticated'] = True
+            with patch('main.os.link', side_effect=OSError(errno.EXDEV, 'Invalid cross-device link')):
+                client.post('/move_to_completed', data={'filename': 'a.mp4'})
+                (tmp_path / 'b.mp4').write_bytes(b'other video')
+                with open(os.path.join(temp_download_dir, 'b.mp4'), 'wb') as f:
+                    f.write(b'new data')
+                client.post('/move_to_completed', data={'filename': 'b.mp4'})
+        
+        assert not os.path.exists(source)
+        assert (tmp_path / 'a.mp4').read_bytes() == b'video data'
+        # The O_EXCL fallback leaves an existing destination alone as well
+        assert (tmp_path / 'b.mp4').read_bytes() == b'other video'
+        assert os.path.exists(os.path.join(temp_download_dir, 'b.mp4'))
+
+    @patch('main.ENABLE_AUTO_MOVE', False)
+    @patch('main.DOWNLOAD_SESSION.get')
+    def test_download_without_auto_move_is_completed(self, mock_get, temp_download_dir):
+        """Test that a finished download left in place is marked completed, not stuck moving."""
+        mock_response = Mock()
+        mock_response.headers = {'content-length': '9'}
+        mock_response.raw = io.BytesIO(b'test data')
+        mock_response.__enter__ = Mock(return_value=mock_response)
+        mock_response.__exit__ = Mock(return_value=None)
+        mock_get.return_value = mock_response
+        
+        main.track_download('test-no-move-id', {'status': 'starting', 'start_time': time.time(), 'filename': 'a.mp4', 'error': None})
+        main.download_file_thread('test-no-move-id', 'http://example.com/a.mp4', 'a.mp4')
+        
+        assert main.download_progress['test-no-move-id']['status'] == 'completed'
+        assert os.path.exists(os.path.join(temp_download_dir, 'a.mp4'))
+        
+        # Clean up
+        main.download_progress.clear()
+
 
 class TestSeasonDownload:
     """Test season download functionality."""
@@ -232,6 +722,33 @@ class TestSeasonDownload:
             # Should have called download_file_thread for each episode
             assert mock_download_thread.call_count == 2
 
+    @patch('main.queue_download')
+    @patch('main.resolve_source_url')
+    def test_season_background_queues_in_episode_order(self, mock_resolve, mock_queue):
+        """Test that concurrently resolved episodes are still queued in episode order."""
+        def resolve(link):
+            # Resolve later episodes first to check that ordering is preserved
+            time.sleep(0.05 if link.endswith('1') else 0)
+            return None if link.endswith('3') else f'{link}/file.mp4'
+        mock_resolve.side_effect = resolve
+        
+        episodes = [
+            {'title': 'S01E01', 'link': 'http://example.com/episode1'},
+            {'title': 'S01E02', 'link': 'http://example.com/episode2'},
+            {'title': 'S01E03', 'link': 'http://example.com/episode3'},
+            {'title': 'S01E04'},
+        ]
+        
+        main.process_season_downloads_background(episodes, 'Test Show', 'Season 1 720p')
+        
+        queued = [call.args[1] for call in mock_queue.call_args_list]
+        assert queued == ['http://example.com/episode1/file.mp4', 'http://example.com/episode2/file.mp4']
+        assert mock_resolve.call_count == 3
+        
+        # Clean up
+        main.download_progress.clear()
+        main.season_processing.clear()
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -1,14 +1,10 @@
 """Tests for Flask application endpoints and functionality."""
 
 import pytest
-import json
-import sys
-import os
+import orjson
+from types import SimpleNamespace
 from unittest.mock import Mock, patch, MagicMock
 
-# Add the parent directory to the path to import main
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 import main
 
 
@@ -23,6 +19,14 @@ class TestFlaskApplication:
         with main.app.test_client() as client:
             yield client
     
+    @pytest.fixture
+    def mock_endpoint(self):
+        """Patch main.Endpoint and return the instance the routes will fetch from."""
+        with patch('main.Endpoint') as endpoint_class:
+            mock_instance = Mock()
+            endpoint_class.return_value = mock_instance
+            yield mock_instance
+    
     def test_index_page(self, client):
         """Test the index page loads correctly."""
         response = client.get('/')
@@ -35,12 +39,10 @@ class TestFlaskApplication:
         assert response.status_code == 200
         assert b'login' in response.data.lower()
     
-    @patch('main.Endpoint')
-    def test_search_functionality(self, mock_endpoint, client):
+    def test_search_functionality(self, client, mock_endpoint):
         """Test the search functionality."""
         # Mock the API response
-        mock_instance = Mock()
-        mock_instance.fetch.return_value = (
+        mock_endpoint.fetch.return_value = (
             {
                 'searchResults': [
                     {
@@ -53,18 +55,15 @@ class TestFlaskApplication:
             200,
             None
         )
-        mock_endpoint.return_value = mock_instance
         
         response = client.post('/search', data={'search_query': 'big bang theory'})
         assert response.status_code == 200
         assert b'Big Bang Theory' in response.data
     
-    @patch('main.Endpoint')
-    def test_qualities_page(self, mock_endpoint, client):
+    def test_qualities_page(self, client, mock_endpoint):
         """Test the qualities selection page."""
         # Mock the API response
-        mock_instance = Mock()
-        mock_instance.fetch.return_value = (
+        mock_endpoint.fetch.return_value = (
             {
                 'sourceQualityList': [
                     {
@@ -76,7 +75,6 @@ class TestFlaskApplication:
             200,
             None
         )
-        mock_endpoint.return_value = mock_instance
         
         response = client.post('/qualities', data={
             'url': 'http://example.com/show',
@@ -86,12 +84,10 @@ class TestFlaskApplication:
         assert response.status_code == 200
         assert b'Season 1 720p' in response.data
     
-    @patch('main.Endpoint')
-    def test_episodes_page(self, mock_endpoint, client):
+    def test_episodes_page(self, client, mock_endpoint):
         """Test the episodes selection page."""
         # Mock the API response
-        mock_instance = Mock()
-        mock_instance.fetch.return_value = (
+        mock_endpoint.fetch.return_value = (
             {
                 'sourceEpisodes': [
                     {
@@ -103,7 +99,6 @@ class TestFlaskApplication:
             200,
             None
         )
-        mock_endpoint.return_value = mock_instance
         
         response = client.post('/episodes', data={
             'episodes_api_url': 'http://example.com/episodes',
@@ -121,18 +116,17 @@ class TestFlaskApplication:
         assert response.status_code == 200
         assert b'Download Queue' in response.data
     
+    @patch.dict(main.download_progress, clear=True)
     def test_list_downloads_empty(self, client):
         """Test listing downloads when queue is empty."""
-        # Clear the download progress
-        main.download_progress.clear()
-        
         response = client.get('/list_downloads')
         assert response.status_code == 200
         
-        data = json.loads(response.data)
+        data = response.get_json()
         assert 'downloads' in data
         assert len(data['downloads']) == 0
     
+    @patch.dict(main.download_progress, clear=True)
     def test_list_downloads_with_items(self, client):
         """Test listing downloads when there are items in the queue."""
         # Add a mock download to the progress
@@ -150,14 +144,28 @@ class TestFlaskApplication:
         response = client.get('/list_downloads')
         assert response.status_code == 200
         
-        data = json.loads(response.data)
+        data = response.get_json()
         assert 'downloads' in data
         assert len(data['downloads']) == 1
         assert data['downloads'][0]['filename'] == 'Test.Show.S01E01.720p.mp4'
         assert data['downloads'][0]['status'] == 'downloading'
+    
+    @patch.dict(main.download_progress, clear=True)
+    def test_list_downloads_not_modified(self, client):
+        """Test that polling with the previous ETag returns 304 while nothing changes."""
+        with client.session_transaction() as sess:
+            sess['authenticated'] = True
         
-        # Clean up
-        main.download_progress.clear()
+        first = client.get('/downloads')
+        etag = first.headers['ETag']
+        
+        second = client.get('/downloads', headers={'If-None-Match': etag})
+        assert second.status_code == 304
+        assert second.data == b''
+        
+        main.download_progress['test-download-id'] = {'filename': 'a.mp4', 'status': 'queued'}
+        third = client.get('/downloads', headers={'If-None-Match': etag})
+        assert third.status_code == 200
 
 
 class TestEndpointClass:
@@ -177,15 +185,12 @@ class TestEndpointClass:
         assert endpoint.method == "POST"
         assert endpoint.payload == {"key": "value"}
     
-    @patch('main.requests.post')
-    def test_endpoint_fetch_post(self, mock_post):
+    @patch('Endpoint._SESSION.request')
+    def test_endpoint_fetch_post(self, mock_request):
         """Test Endpoint fetch method with POST request."""
-        # Mock the response
-        mock_response = Mock()
-        mock_response.json.return_value = {"result": "success"}
-        mock_response.status_code = 200
-        mock_response.text = '{"result": "success"}'
-        mock_post.return_value = mock_response
+        # Mock the response; fetch decodes its raw content with orjson
+        mock_response = SimpleNamespace(content=orjson.dumps({"result": "success"}), status_code=200, text='{"result": "success"}')
+        mock_request.return_value = mock_response
         
         endpoint = main.Endpoint(
             url="http://example.com",
@@ -194,22 +199,21 @@ class TestEndpointClass:
             payload={"key": "value"}
         )
         
-        data, status_code, text = endpoint.fetch()
+        data, status_code, response = endpoint.fetch()
         
         assert data == {"result": "success"}
         assert status_code == 200
-        assert text == '{"result": "success"}'
-        mock_post.assert_called_once()
+        assert response.text == '{"result": "success"}'
+        mock_request.assert_called_once()
+        assert mock_request.call_args.kwargs['method'] == 'POST'
+        assert mock_request.call_args.kwargs['json'] == {"key": "value"}
     
-    @patch('main.requests.get')
-    def test_endpoint_fetch_get(self, mock_get):
+    @patch('Endpoint._SESSION.request')
+    def test_endpoint_fetch_get(self, mock_request):
         """Test Endpoint fetch method with GET request."""
-        # Mock the response
-        mock_response = Mock()
-        mock_response.json.return_value = {"result": "success"}
-        mock_response.status_code = 200
-        mock_response.text = '{"result": "success"}'
-        mock_get.return_value = mock_response
+        # Mock the response; fetch decodes its raw content with orjson
+        mock_response = SimpleNamespace(content=orjson.dumps({"result": "success"}), status_code=200, text='{"result": "success"}')
+        mock_request.return_value = mock_response
         
         endpoint = main.Endpoint(
             url="http://example.com",
@@ -217,42 +221,209 @@ class TestEndpointClass:
             method="GET"
         )
         
-        data, status_code, text = endpoint.fetch()
+        data, status_code, response = endpoint.fetch()
+        
+        assert data == {"result": "success"}
+        assert status_code == 200
+        mock_request.assert_called_once()
+        assert mock_request.call_args.kwargs['method'] == 'GET'
+
+    def test_endpoint_fetch_uses_injected_session(self):
+        """Test Endpoint fetch sends JSON payloads through the given session."""
+        mock_response = SimpleNamespace(content=b'{"result": "success"}', status_code=200, text='{"result": "success"}')
+        mock_session = Mock()
+        mock_session.request.return_value = mock_response
+        
+        endpoint = main.Endpoint(
+            url="http://example.com",
+            headers={"Content-Type": "application/json"},
+            method="POST",
+            payload={"key": "value"},
+            session=mock_session
+        )
+        
+        data, status_code, response = endpoint.fetch()
         
         assert data == {"result": "success"}
         assert status_code == 200
-        mock_get.assert_called_once()
+        mock_session.request.assert_called_once_with(
+            method="POST",
+            url="http://example.com",
+            headers={"Content-Type": "application/json"},
+            json={"key": "value"}
+        )
+
+    def test_endpoint_uses_session_default_headers(self):
+        """Test Endpoint without headers relies on the session's JSON headers."""
+        session = main.create_session(headers={"Content-Type": "application/json"})
+        mock_response = SimpleNamespace(content=b'{}', status_code=200, text='{}')
+        
+        with patch.object(session, 'request', return_value=mock_response) as mock_request:
+            endpoint = main.Endpoint(url="http://example.com", method="POST", payload={"key": "value"}, session=session)
+            endpoint.fetch()
+        
+        mock_request.assert_called_once_with(method="POST", url="http://example.com", json={"key": "value"})
+
+    def test_endpoint_passes_timeout(self):
+        """Test Endpoint forwards its timeout to the session request."""
+        mock_response = SimpleNamespace(content=b'{}', status_code=200, text='{}')
+        mock_session = Mock()
+        mock_session.headers = {}
+        mock_session.request.return_value = mock_response
+        
+        main.Endpoint(url="http://example.com", session=mock_session, timeout=(5, 30)).fetch()
+        
+        assert mock_session.request.call_args.kwargs['timeout'] == (5, 30)
+
+    def test_endpoint_hash_follows_in_place_changes(self):
+        """Test equal Endpoints keep equal hashes after their dicts are edited in place."""
+        first = main.Endpoint(url="http://example.com", payload={"a": 1})
+        second = main.Endpoint(url="http://example.com", payload={"a": 2})
+        hash(first)
+        str(first)
+        
+        first.payload["a"] = 2
+        
+        assert first == second
+        assert hash(first) == hash(second)
+        assert "'a': 2" in str(first)
+
+
+class TestApiCache:
+    """Test the upstream API response cache."""
+    
+    @patch('main.Endpoint')
+    def test_fetch_api_cached_reuses_successful_response(self, mock_endpoint):
+        """Test that a repeated request is served from cache unless bypassed."""
+        mock_instance = Mock()
+        mock_instance.fetch.return_value = ({'searchResult': []}, 200, None)
+        mock_endpoint.return_value = mock_instance
+        main.api_cache.clear()
+        
+        first = main.fetch_api_cached('search', {"searchQuery": "friends"})
+        second = main.fetch_api_cached('search', {"searchQuery": "friends"})
+        assert first[:2] == second[:2] == ({'searchResult': []}, 200)
+        assert mock_instance.fetch.call_count == 1
+        
+        main.fetch_api_cached('search', {"searchQuery": "friends"}, use_cache=False)
+        assert mock_instance.fetch.call_count == 2
+        
+        main.api_cache.clear()
+    
+    @patch('main.Endpoint')
+    def test_fetch_api_cached_skips_errors(self, mock_endpoint):
+        """Test that failed responses are not cached."""
+        mock_instance = Mock()
+        mock_instance.fetch.return_value = ({}, 500, None)
+        mock_endpoint.return_value = mock_instance
+        main.api_cache.clear()
+        
+        main.fetch_api_cached('sourceQuality', {"url": "http://example.com"})
+        main.fetch_api_cached('sourceQuality', {"url": "http://example.com"})
+        assert mock_instance.fetch.call_count == 2
+    
+    @pytest.mark.parametrize("response_data", ['<html>Bad Gateway</html>', {'error': 'Rate limited'}])
+    @patch('main.Endpoint')
+    def test_fetch_api_cached_skips_unparsed_success(self, mock_endpoint, response_data):
+        """Test that a 200 with a text or error body is not cached."""
+        mock_instance = Mock()
+        mock_instance.fetch.return_value = (response_data, 200, None)
+        mock_endpoint.return_value = mock_instance
+        main.api_cache.clear()
+        
+        main.fetch_api_cached('search', {"searchQuery": "friends"})
+        main.fetch_api_cached('search', {"searchQuery": "friends"})
+        assert mock_instance.fetch.call_count == 2
+        assert not main.api_cache
+    
+    @patch('main.Endpoint')
+    def test_fetch_api_cached_never_caches_source_urls(self, mock_endpoint):
+        """Test that signed download links are fetched fresh every time."""
+        mock_instance = Mock()
+        mock_instance.fetch.return_value = ({'sourceUrl': 'http://example.com/a.mp4'}, 200, None)
+        mock_endpoint.return_value = mock_instance
+        main.api_cache.clear()
+        
+        main.fetch_api_cached('sourceUrl', {"url": "http://example.com", "seriesType": "episode"})
+        main.fetch_api_cached('sourceUrl', {"url": "http://example.com", "seriesType": "episode"})
+        assert mock_instance.fetch.call_count == 2
+        assert not main.api_cache
 
 
 class TestUtilityFunctions:
     """Test utility functions."""
     
-    def test_format_size(self):
+    @pytest.mark.parametrize("size_bytes,expected", [
+        (0, "0 B"),
+        (1024, "1.00 KB"),
+        (1024 * 1024, "1.00 MB"),
+        (1024 * 1024 * 1024, "1.00 GB"),
+        (1536, "1.50 KB"),  # 1.5 KB
+    ])
+    def test_format_size(self, size_bytes, expected):
         """Test the format_size function."""
-        test_cases = [
-            (0, "0 B"),
-            (1024, "1.0 KB"),
-            (1024 * 1024, "1.0 MB"),
-            (1024 * 1024 * 1024, "1.0 GB"),
-            (1536, "1.5 KB"),  # 1.5 KB
-        ]
-        
-        for size_bytes, expected in test_cases:
-            result = main.format_size(size_bytes)
-            assert result == expected
+        assert main.format_size(size_bytes) == expected
     
-    def test_format_speed(self):
+    @pytest.mark.parametrize("speed_bytes_per_sec,expected", [
+        (0, "0 B/s"),
+        (1024, "1.00 KB/s"),
+        (1024 * 1024, "1.00 MB/s"),
+        (1536, "1.50 KB/s"),  # 1.5 KB/s
+    ])
+    def test_format_speed(self, speed_bytes_per_sec, expected):
         """Test the format_speed function."""
-        test_cases = [
-            (0, "0 B/s"),
-            (1024, "1.0 KB/s"),
-            (1024 * 1024, "1.0 MB/s"),
-            (1536, "1.5 KB/s"),  # 1.5 KB/s
-        ]
-        
-        for speed_bytes_per_sec, expected in test_cases:
-            result = main.format_speed(speed_bytes_per_sec)
-            assert result == expected
+        assert main.format_speed(speed_bytes_per_sec) == expected
+    
+    @pytest.mark.parametrize("size_bytes,expected", [
+        (0.5, "0.50 B"),
+        (1023, "1023.00 B"),
+        (1024, "1.00 KB"),
+        (1024 * 1024 - 1, "1024.00 KB"),
+        (1024 * 1024, "1.00 MB"),
+        (1024 ** 4, "1.00 TB"),
+        (2048 * 1024 ** 4, "2048.00 TB"),
+    ])
+    def test_format_size_unit_boundaries(self, size_bytes, expected):
+        """Test format_size switches units exactly at powers of 1024."""
+        assert main.format_size(size_bytes) == expected
+    
+    def test_add_to_search_history(self):
+        """Test that search history keeps the 5 most recent distinct queries, newest first."""
+        main.search_history.clear()
+        for query in ['a', 'b', 'c', 'a', 'd', 'e', 'f']:
+            main.add_to_search_history(query)
+        
+        assert list(main.search_history) == ['f', 'e', 'd', 'a', 'c']
+        
+        main.search_history.clear()
+    
+    @pytest.mark.parametrize("filename,unsafe", [
+        ('', True),
+        (None, True),
+        ('/etc/passwd', True),
+        ('../secret', True),
+        ('a/../../b', True),
+        ('a\x00.mp4', True),
+        ('..\\b', True),
+        ('Test.Show.S01E01.720p.mp4', False),
+        ('Season 1/Episode.mp4', False),
+    ])
+    def test_is_unsafe_filename(self, filename, unsafe):
+        """Test that filenames which could escape their directory are rejected."""
+        assert main.is_unsafe_filename(filename) == unsafe
+    
+    def test_list_directory_files(self, tmp_path):
+        """Test directory listing skips subdirectories and sorts by name."""
+        (tmp_path / 'b.mp4').write_bytes(b'x' * 10)
+        (tmp_path / 'a.mp4').write_bytes(b'')
+        (tmp_path / 'subdir').mkdir()
+        
+        files = main.list_directory_files(tmp_path, 'completed')
+        
+        assert [f['name'] for f in files] == ['a.mp4', 'b.mp4']
+        assert files[1]['size'] == main.format_size(10)
+        assert all(f['location'] == 'completed' for f in files)
+        assert main.list_directory_files(tmp_path / 'missing', 'downloads') == []
 
 
 if __name__ == "__main__":